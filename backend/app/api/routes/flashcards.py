@@ -4,7 +4,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from app.schemas.responses import ApiResponse, FlashcardItem, FlashcardsResponse
-from app.services.ai_service import generate_flashcards
+from app.services.ai_service import FLASHCARDS_PROMPT_VERSION, generate_flashcards, generation_model
+from app.services.generation_cache import KIND_FLASHCARDS, get_generated_set, save_generated_set
 from app.services.rag_service import get_document_content
 from app.utils.logging_config import get_logger
 
@@ -17,11 +18,25 @@ class GenerateFlashcardsBody(BaseModel):
     """Request body for flashcard generation."""
 
     document_id: str
+    regenerate: bool = False  # ignore the stored set and call the LLM again
 
 
 @router.post("", response_model=ApiResponse[FlashcardsResponse])
 async def generate_flashcards_endpoint(body: GenerateFlashcardsBody):
-    """Generate 10-15 flashcards from processed document content."""
+    """Generate 10-15 flashcards from processed document content (stored set reused unless regenerate)."""
+    key = (body.document_id, KIND_FLASHCARDS, FLASHCARDS_PROMPT_VERSION, generation_model())
+    if not body.regenerate:
+        stored = await get_generated_set(key)
+        if stored:
+            return ApiResponse(
+                data=FlashcardsResponse(
+                    flashcards=stored,
+                    document_id=body.document_id,
+                    count=len(stored),
+                    cached=True,
+                )
+            )
+
     content = await get_document_content(body.document_id)
     if not content:
         raise HTTPException(
@@ -30,7 +45,7 @@ async def generate_flashcards_endpoint(body: GenerateFlashcardsBody):
         )
 
     try:
-        items = await generate_flashcards(content, body.document_id)
+        items, model = await generate_flashcards(content, body.document_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -47,6 +62,9 @@ async def generate_flashcards_endpoint(body: GenerateFlashcardsBody):
             status_code=500,
             detail="Could not generate flashcards. Please try again.",
         )
+    # Stored under the model that actually answered, so a fallback set never stands in for the preferred model
+    stored_key = (body.document_id, KIND_FLASHCARDS, FLASHCARDS_PROMPT_VERSION, model)
+    await save_generated_set(stored_key, [card.model_dump() for card in flashcards])
 
     return ApiResponse(
         data=FlashcardsResponse(
@@ -0,0 +1,36 @@
+"""Background job status endpoint."""
+
+from fastapi import APIRouter, HTTPException
+
+from app.schemas.responses import ApiResponse, JobStatusResponse
+from app.services.jobs import get_job_queue
+from app.utils.logging_config import get_logger
+
+logger = get_logger("api.jobs")
+
+router = APIRouter(prefix="/jobs", tags=["Content"])
+
+
+@router.get("/{job_id}", response_model=ApiResponse[JobStatusResponse])
+async def get_job(job_id: str):
+    """Report stage and progress of an ingestion job (extracted, chunked, embedded N/M, stored)."""
+    job = get_job_queue().get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404,
+            detail="Job not found. It may have expired; please process the content again.",
+        )
+    return ApiResponse(
+        data=JobStatusResponse(
+            job_id=job.id,
+            kind=job.kind,
+            document_id=job.document_id,
+            status=job.status,
+            stage=job.stage,
+            progress=job.progress,
+            error=job.error,
+            result=job.result,
+            created_at=job.created_at,
+            updated_at=job.updated_at,
+        )
+    )
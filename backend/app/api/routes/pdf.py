@@ -1,24 +1,134 @@
 """PDF processing endpoint."""
 
 import hashlib
+import os
+import tempfile
 import traceback
 import uuid
+from typing import Tuple
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, File, HTTPException, Request, UploadFile
+from fastapi.responses import JSONResponse
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 
-from app.schemas.responses import ApiResponse, ProcessContentResponse
-from app.services.pdf_extractor import extract_text_from_pdf
-from app.services.rag_service import upsert_document
+from app.config import get_settings
+from app.schemas.responses import ApiResponse, IngestionJobResponse
+from app.services.ingestion import find_existing_result, ingest_pdf
+from app.services.jobs import JobQueueFull, get_job_queue
 from app.utils.logging_config import get_logger
 
 logger = get_logger("api.pdf")
 
 router = APIRouter(prefix="/process-pdf", tags=["Content"])
 
+UPLOAD_CHUNK_BYTES = 1024 * 1024
 
-@router.post("", response_model=ApiResponse[ProcessContentResponse])
+
+# Multipart boundaries and headers on top of the file itself
+_MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+def _too_large_detail(max_bytes: int) -> str:
+    return f"File too large. Maximum size is {max_bytes // (1024 * 1024)}MB."
+
+
+class UploadSizeGuard:
+    """
+    Pure ASGI middleware enforcing max_upload_bytes (413) on POST /process-pdf only; every other
+    request, including the SSE /chat stream, passes straight through. Uploads are rejected from
+    Content-Length before the body is read, and body bytes are counted as they arrive, so a chunked
+    upload without Content-Length is cut off at the limit instead of being received in full.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"].rstrip("/") != router.prefix:
+            await self.app(scope, receive, send)
+            return
+
+        max_bytes = get_settings().max_upload_bytes
+        limit = max_bytes + _MULTIPART_OVERHEAD_BYTES
+        too_large = JSONResponse(status_code=413, content={"detail": _too_large_detail(max_bytes)})
+        try:
+            declared = int(Headers(scope=scope).get("content-length") or 0)
+        except ValueError:
+            declared = 0
+        if declared > limit:
+            await too_large(scope, receive, send)
+            return
+
+        received = 0
+        rejected = False
+        response_started = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # The app sees a disconnect and stops parsing; the 413 is sent below
+                    rejected = True
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message: Message) -> None:
+            nonlocal response_started
+            if rejected:
+                return
+            if message["type"] == "http.response.start":
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            if not rejected:
+                raise
+        if rejected and not response_started:
+            await too_large(scope, receive, send)
+
+
+async def _spool_upload(file: UploadFile, max_bytes: int) -> Tuple[str, str]:
+    """
+    Copy the upload in chunks to a temp file, enforcing max_bytes as we go (413, like UploadSizeGuard).
+    Returns (path, sha256 hex digest of the full file), hashed in the same pass.
+
+    This is the second copy of the file: Starlette's multipart parser has already written it to a
+    SpooledTemporaryFile (in memory up to 1MB, then on disk) before the route runs, with the size
+    capped by UploadSizeGuard. That first copy is unavoidable without replacing the form parser; this
+    one gives the job a named file that outlives the request for the PDF workers to mmap.
+    """
+    settings = get_settings()
+    fd, path = tempfile.mkstemp(prefix="saiv_pdf_", suffix=".pdf", dir=settings.upload_spool_dir or None)
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await file.read(UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise HTTPException(status_code=413, detail=_too_large_detail(max_bytes))
+                digest.update(chunk)
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    if size == 0:
+        os.unlink(path)
+        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
+    return path, digest.hexdigest()
+
+
+@router.post("", status_code=202, response_model=ApiResponse[IngestionJobResponse])
 async def process_pdf(file: UploadFile = File(..., alias="file")):
-    """Process uploaded PDF: extract text and index for RAG."""
+    """Accept an uploaded PDF and queue text extraction and RAG indexing. Poll GET /jobs/{job_id}."""
     filename = (file.filename or "").strip() or "document.pdf"
     if not filename.lower().endswith(".pdf"):
         raise HTTPException(
@@ -27,8 +137,9 @@ async def process_pdf(file: UploadFile = File(..., alias="file")):
         )
 
     try:
-        # Read raw bytes from upload
-        content_bytes = await file.read()
+        path, content_hash = await _spool_upload(file, get_settings().max_upload_bytes)
+    except HTTPException:
+        raise
     except Exception as e:
         traceback.print_exc()
         logger.warning("PDF read failed", error=str(e))
@@ -37,52 +148,43 @@ async def process_pdf(file: UploadFile = File(..., alias="file")):
             detail="Could not read file. The file may be corrupted or too large.",
         )
 
-    if not content_bytes:
-        raise HTTPException(status_code=400, detail="Uploaded file is empty.")
-
-    if len(content_bytes) > 10 * 1024 * 1024:  # 10MB limit
-        raise HTTPException(
-            status_code=400,
-            detail="File too large. Maximum size is 10MB.",
-        )
-
-    # Extract text
-    try:
-        title, text = extract_text_from_pdf(content_bytes, filename)
-    except ValueError as e:
-        traceback.print_exc()
-        raise HTTPException(status_code=400, detail=str(e))
-
-    if not text.strip():
-        raise HTTPException(
-            status_code=400,
-            detail="No readable text could be extracted from this PDF.",
+    # Identical bytes already indexed: answer now, without re-extracting or re-embedding
+    existing = await find_existing_result("pdf", content_hash)
+    if existing is not None:
+        os.unlink(path)
+        job = get_job_queue().complete("pdf", existing["document_id"], existing)
+        return ApiResponse(
+            data=IngestionJobResponse(
+                job_id=job.id,
+                document_id=job.document_id,
+                status=job.status,
+                message=existing["message"],
+                result=existing,
+            )
         )
 
     document_id = str(uuid.uuid4())
-    source_id = hashlib.sha256(content_bytes[:1024]).hexdigest()[:32]
-
     try:
-        chunk_count = await upsert_document(
-            document_id=document_id,
-            source_type="pdf",
-            source_id=source_id,
-            title=title,
-            content=text,
-            metadata={"filename": filename},
+        # The job owns the temp file from here on and deletes it when done (or dropped at shutdown)
+        job = get_job_queue().submit(
+            "pdf",
+            document_id,
+            lambda progress: ingest_pdf(path, filename, document_id, content_hash, progress),
+            key=f"pdf:{content_hash}",
+            on_drop=lambda: os.unlink(path),
         )
-    except Exception as e:
-        traceback.print_exc()
-        # Surface Supabase / embedding / config errors clearly
-        raise HTTPException(status_code=500, detail=str(e))
+    except JobQueueFull as e:
+        os.unlink(path)
+        raise HTTPException(status_code=503, detail=str(e))
+    if job.document_id != document_id:
+        # Joined an in-flight ingestion of the same file; this copy is not needed
+        os.unlink(path)
 
-    preview = text[:500] + ("..." if len(text) > 500 else "")
     return ApiResponse(
-        data=ProcessContentResponse(
-            document_id=document_id,
-            title=title,
-            content_preview=preview,
-            chunk_count=chunk_count,
-            message="PDF processed and indexed successfully.",
+        data=IngestionJobResponse(
+            job_id=job.id,
+            document_id=job.document_id,
+            status=job.status,
+            message="PDF received. Processing in the background.",
         )
     )
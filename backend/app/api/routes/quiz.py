@@ -4,7 +4,8 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
 from app.schemas.responses import ApiResponse, QuizItem, QuizResponse
-from app.services.ai_service import generate_quiz
+from app.services.ai_service import QUIZ_PROMPT_VERSION, generate_quiz, generation_model
+from app.services.generation_cache import KIND_QUIZ, get_generated_set, save_generated_set
 from app.services.rag_service import get_document_content
 from app.utils.logging_config import get_logger
 
@@ -17,11 +18,25 @@ class GenerateQuizBody(BaseModel):
     """Request body for quiz generation."""
 
     document_id: str
+    regenerate: bool = False  # ignore the stored set and call the LLM again
 
 
 @router.post("", response_model=ApiResponse[QuizResponse])
 async def generate_quiz_endpoint(body: GenerateQuizBody):
-    """Generate 5-10 MCQ questions from processed document content."""
+    """Generate 5-10 MCQ questions from processed document content (stored set reused unless regenerate)."""
+    key = (body.document_id, KIND_QUIZ, QUIZ_PROMPT_VERSION, generation_model())
+    if not body.regenerate:
+        stored = await get_generated_set(key)
+        if stored:
+            return ApiResponse(
+                data=QuizResponse(
+                    quiz=stored,
+                    document_id=body.document_id,
+                    count=len(stored),
+                    cached=True,
+                )
+            )
+
     content = await get_document_content(body.document_id)
     if not content:
         raise HTTPException(
@@ -30,7 +45,7 @@ async def generate_quiz_endpoint(body: GenerateQuizBody):
         )
 
     try:
-        items = await generate_quiz(content, body.document_id)
+        items, model = await generate_quiz(content, body.document_id)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -55,6 +70,10 @@ async def generate_quiz_endpoint(body: GenerateQuizBody):
             )
         )
 
+    if quiz:
+        # Stored under the model that actually answered, so a fallback set never stands in for the preferred model
+        stored_key = (body.document_id, KIND_QUIZ, QUIZ_PROMPT_VERSION, model)
+        await save_generated_set(stored_key, [item.model_dump() for item in quiz])
     return ApiResponse(
         data=QuizResponse(
             quiz=quiz,
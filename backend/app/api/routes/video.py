@@ -6,9 +6,10 @@ import uuid
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 
-from app.schemas.responses import ApiResponse, ProcessContentResponse
-from app.services.rag_service import upsert_document
-from app.services.youtube import extract_video_id, fetch_transcript
+from app.schemas.responses import ApiResponse, IngestionJobResponse
+from app.services.ingestion import find_existing_result, ingest_video, video_content_hash
+from app.services.jobs import JobQueueFull, get_job_queue
+from app.services.youtube import extract_video_id
 from app.utils.logging_config import get_logger
 
 logger = get_logger("api.video")
@@ -22,9 +23,9 @@ class ProcessVideoBody(BaseModel):
     url: str
 
 
-@router.post("", response_model=ApiResponse[ProcessContentResponse])
+@router.post("", status_code=202, response_model=ApiResponse[IngestionJobResponse])
 async def process_video(body: ProcessVideoBody):
-    """Process a YouTube video: fetch transcript and index for RAG."""
+    """Queue a YouTube video for transcript fetching and RAG indexing. Poll GET /jobs/{job_id}."""
     try:
         video_id = extract_video_id(body.url)
         if not video_id:
@@ -33,35 +34,37 @@ async def process_video(body: ProcessVideoBody):
                 detail="Invalid YouTube URL. Please provide a valid YouTube video link.",
             )
 
-        # Fetch transcript (may raise ValueError with a user-friendly message)
-        title, content = fetch_transcript(body.url)
-        if not content.strip():
-            raise HTTPException(
-                status_code=400,
-                detail="Transcript is empty. The video may not have usable captions.",
+        # Same video already indexed: answer now, without fetching the transcript or re-embedding
+        existing = await find_existing_result("youtube", video_content_hash(video_id))
+        if existing is not None:
+            job = get_job_queue().complete("youtube", existing["document_id"], existing)
+            return ApiResponse(
+                data=IngestionJobResponse(
+                    job_id=job.id,
+                    document_id=job.document_id,
+                    status=job.status,
+                    message=existing["message"],
+                    result=existing,
+                )
             )
 
         document_id = str(uuid.uuid4())
-
-        chunk_count = await upsert_document(
-            document_id=document_id,
-            source_type="youtube",
-            source_id=video_id,
-            title=title,
-            content=content,
-            metadata={"url": body.url, "video_id": video_id},
+        job = get_job_queue().submit(
+            "youtube",
+            document_id,
+            lambda progress: ingest_video(body.url, video_id, document_id, progress),
+            key=f"youtube:{video_id}",
         )
-
-        preview = content[:500] + ("..." if len(content) > 500 else "")
         return ApiResponse(
-            data=ProcessContentResponse(
-                document_id=document_id,
-                title=title,
-                content_preview=preview,
-                chunk_count=chunk_count,
-                message="Video transcript processed and indexed successfully.",
+            data=IngestionJobResponse(
+                job_id=job.id,
+                document_id=job.document_id,
+                status=job.status,
+                message="Video received. Fetching transcript in the background.",
             )
         )
+    except JobQueueFull as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except ValueError as e:
         logger.warning("Video processing validation error", error=str(e))
         raise HTTPException(status_code=400, detail=str(e))
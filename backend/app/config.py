@@ -17,6 +17,8 @@ class Settings(BaseSettings):
     supabase_url: str = ""
     supabase_service_key: str = ""
     supabase_anon_key: str = ""
+    # Direct Postgres connection string; only used by maintenance scripts (backend/scripts/)
+    database_url: str = ""
 
     # OpenAI (optional)
     openai_api_key: str = ""
@@ -24,6 +26,23 @@ class Settings(BaseSettings):
     embedding_model: str = "text-embedding-3-small"
     embedding_dimensions: int = 1536
     embedding_fallback_to_local: bool = True
+    # Embedding batch dispatch: batches in flight, client-side rate limits per provider, 429 retries
+    embedding_max_concurrency: int = 4
+    embedding_max_retries: int = 5
+    openai_embedding_rpm: int = 3000
+    openai_embedding_tpm: int = 1000000
+    gemini_embedding_rpm: int = 100
+    gemini_embedding_tpm: int = 30000
+    # Content-addressed embedding cache (in-memory LRU over a local SQLite file)
+    embedding_cache_enabled: bool = True
+    embedding_cache_path: str = ".cache/embeddings.sqlite3"
+    embedding_cache_memory_items: int = 10000
+    # Chat query -> embedding LRU (0 items disables); shared across requests and users
+    query_embedding_cache_items: int = 2048
+    query_embedding_cache_ttl_seconds: int = 3600
+    # Local fastembed model: ONNX intra-op threads (0 = runtime default); load + warm up at startup
+    local_embedding_threads: int = 0
+    local_embedding_preload: bool = False
 
     # Google Gemini - free tier (get key at https://aistudio.google.com/apikey)
     gemini_api_key: str = ""
@@ -32,12 +51,79 @@ class Settings(BaseSettings):
 
     # AI provider for chat/flashcards/quiz: "openai" | "gemini" | "auto" (auto = try OpenAI, then Gemini)
     ai_provider: str = "auto"
+    # Threads for blocking Gemini SDK calls (a streamed chat holds one for the whole answer)
+    gemini_workers: int = 8
+
+    # Shared provider HTTP pools (OpenAI / Gemini clients live for the whole process)
+    http_max_connections: int = 100
+    http_max_keepalive_connections: int = 20
+    http_keepalive_expiry_seconds: float = 30.0
+    http_timeout_seconds: float = 60.0
+    http_connect_timeout_seconds: float = 10.0
 
     # Processing limits
     max_pdf_pages: int = 100
+    # PDF uploads are streamed to a temp file (in upload_spool_dir, default system temp) up to this size
+    max_upload_bytes: int = 10 * 1024 * 1024
+    upload_spool_dir: str = ""
+    # PDF extraction process pool (0 workers = one per CPU), pages per worker task, per-document time budget
+    pdf_process_workers: int = 2
+    pdf_pages_per_task: int = 25
+    pdf_extraction_timeout_seconds: float = 120.0
     max_chunk_size: int = 512
     chunk_overlap: int = 50
     max_retrieval_chunks: int = 5
+    # Ranked retrieval results per (document_id, quantized query embedding, top_k); 0 items disables
+    retrieval_cache_items: int = 1024
+    retrieval_cache_ttl_seconds: int = 600
+    # HNSW candidate list size per query (match_document_chunks_hnsw); 0 = plain match_document_chunks
+    hnsw_ef_search: int = 40
+    # Documents with at most this many chunks are searched exactly instead of through the ANN index
+    retrieval_exact_scan_max_chunks: int = 2000
+    # Chunk vector storage: "vector" (float32) | "halfvec" (float16 column, ~2x smaller table and index)
+    # | "binary" (float32 + sign bits; ~32x smaller ANN index). binary re-ranks top_k * vector_rerank_factor
+    # Hamming candidates by exact cosine. Migrate with scripts/migrate_vector_index.py --storage <mode>
+    vector_storage: str = "vector"
+    vector_rerank_factor: int = 4
+    # Hybrid retrieval: full-text + vector candidates (top_k * hybrid_candidate_factor each) merged
+    # with reciprocal rank fusion (database/migrations/004). Queries of at most keyword_query_max_terms
+    # words try full-text first and skip the query embedding when it finds top_k chunks.
+    hybrid_retrieval: bool = True
+    hybrid_candidate_factor: int = 2
+    rrf_k: int = 60
+    keyword_query_max_terms: int = 4
+    # Where chunk vectors live and are searched: "supabase" (pgvector RPCs) | "local" (per-document
+    # float32 files under vector_store_path, memory-mapped and searched in-process; single node only)
+    vector_store: str = "supabase"
+    vector_store_path: str = ".cache/vectors"
+    # local: documents with at least this many chunks also get an HNSW graph (needs hnswlib); 0 = exact only
+    local_hnsw_min_chunks: int = 20000
+    local_vector_store_max_documents: int = 256
+    chunk_insert_batch_size: int = 100
+    chunk_insert_concurrency: int = 4
+
+    # YouTube transcripts: dedicated thread pool, per-request timeout, concurrent yt-dlp cap
+    transcript_fetch_workers: int = 4
+    transcript_fetch_timeout_seconds: float = 60.0
+    ytdlp_max_concurrency: int = 2
+
+    # Transcript cache keyed by (video_id, language): in-memory LRU over SQLite; failures cached briefly
+    transcript_cache_enabled: bool = True
+    transcript_cache_path: str = ".cache/transcripts.sqlite3"
+    transcript_cache_memory_items: int = 256
+    transcript_cache_ttl_seconds: int = 7 * 24 * 3600
+    transcript_cache_negative_ttl_seconds: int = 600
+
+    # Background ingestion jobs: worker pool size, max queued jobs, job store ("memory" | "sqlite")
+    ingestion_workers: int = 2
+    ingestion_queue_size: int = 100
+    job_store: str = "memory"
+    job_store_path: str = ".cache/jobs.sqlite3"
+    job_retention_seconds: int = 3600
+
+    # Generated flashcard/quiz sets: "supabase" (generated_sets table) | "sqlite" (local file) | "off"
+    generation_store: str = "supabase"
+    generation_store_path: str = ".cache/generated.sqlite3"
 
     # CORS
     cors_origins: list[str] = ["http://localhost:3000", "http://127.0.0.1:3000"]
@@ -1,13 +1,24 @@
 """SaiV FastAPI application entry point."""
 
+import asyncio
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.routes import chat, flashcards, pdf, quiz, video
+from app.api.routes import chat, flashcards, jobs, pdf, quiz, video
 from app.config import get_settings
+from app.services.ai_service import shutdown_gemini_executor
+from app.services.clients import close_registry, init_registry
+from app.services.embedding_cache import close_embedding_cache, get_embedding_cache
+from app.services.embeddings import get_query_embedding_cache, preload_local_embedding_model
+from app.services.jobs import start_job_queue, stop_job_queue
+from app.services.pdf_extractor import shutdown_pdf_pool
+from app.services.generation_cache import close_generation_store
+from app.services.rag_service import close_vector_store, get_retrieval_cache, init_supabase_client
+from app.services.transcript_cache import close_transcript_cache, get_transcript_cache
+from app.services.youtube import shutdown_transcript_executor
 from app.utils.logging_config import configure_logging, get_logger
 
 
@@ -18,8 +29,23 @@ async def lifespan(app: FastAPI):
     load_dotenv()
     configure_logging()
     get_logger("main").info("SaiV API starting")
+    settings = get_settings()
+    init_registry(settings)
+    init_supabase_client()
+    if settings.embedding_fallback_to_local and settings.local_embedding_preload:
+        await asyncio.get_event_loop().run_in_executor(None, preload_local_embedding_model)
+    await start_job_queue()
     yield
     get_logger("main").info("SaiV API shutting down")
+    await stop_job_queue()
+    shutdown_transcript_executor()
+    shutdown_gemini_executor()
+    shutdown_pdf_pool()
+    await close_registry()
+    close_embedding_cache()
+    close_transcript_cache()
+    close_generation_store()
+    close_vector_store()
 
 
 def create_app() -> FastAPI:
@@ -40,9 +66,12 @@ def create_app() -> FastAPI:
         allow_headers=["*"],
     )
 
+    app.add_middleware(pdf.UploadSizeGuard)
+
     # Mount routes
     app.include_router(video.router)
     app.include_router(pdf.router)
+    app.include_router(jobs.router)
     app.include_router(flashcards.router)
     app.include_router(quiz.router)
     app.include_router(chat.router)
@@ -55,9 +84,11 @@ def create_app() -> FastAPI:
             "version": "1.0.0",
             "docs": "/docs",
             "health": "/health",
+            "metrics": "/metrics",
             "endpoints": [
                 "POST /process-video",
                 "POST /process-pdf",
+                "GET /jobs/{job_id}",
                 "POST /generate-flashcards",
                 "POST /generate-quiz",
                 "POST /chat",
@@ -69,6 +100,20 @@ def create_app() -> FastAPI:
         """Health check endpoint."""
         return {"status": "ok", "service": "saiv-api"}
 
+    @app.get("/metrics")
+    async def metrics():
+        """Cache hit/miss counters."""
+        cache = get_embedding_cache()
+        transcripts = get_transcript_cache()
+        queries = get_query_embedding_cache()
+        retrieval = get_retrieval_cache()
+        return {
+            "embedding_cache": cache.stats() if cache else None,
+            "query_embedding_cache": queries.stats() if queries else None,
+            "retrieval_cache": retrieval.stats() if retrieval else None,
+            "transcript_cache": transcripts.stats() if transcripts else None,
+        }
+
     return app
 
 
@@ -1,6 +1,6 @@
 """Response schemas for API responses."""
 
-from typing import Any, Generic, List, Optional, TypeVar
+from typing import Any, Dict, Generic, List, Optional, TypeVar
 
 from pydantic import BaseModel, Field
 
@@ -28,6 +28,33 @@ class ProcessContentResponse(BaseModel):
     message: str = "Content processed and indexed successfully"
 
 
+class IngestionJobResponse(BaseModel):
+    """Response for content submitted for background processing (video/PDF)."""
+
+    job_id: str
+    document_id: str
+    status: str
+    message: str = "Content received and queued for processing"
+    result: Optional[ProcessContentResponse] = Field(
+        None, description="Set when the content was already indexed (status is succeeded)"
+    )
+
+
+class JobStatusResponse(BaseModel):
+    """Progress of a background ingestion job."""
+
+    job_id: str
+    kind: str
+    document_id: str
+    status: str = Field(..., description="queued | running | succeeded | failed")
+    stage: str = Field(..., description="queued | extracted | chunked | embedding | embedded | stored")
+    progress: Dict[str, int] = Field(default_factory=dict)
+    error: Optional[str] = None
+    result: Optional[ProcessContentResponse] = None
+    created_at: float
+    updated_at: float
+
+
 class FlashcardItem(BaseModel):
     """Single flashcard."""
 
@@ -41,6 +68,7 @@ class FlashcardsResponse(BaseModel):
     flashcards: List[FlashcardItem]
     document_id: str
     count: int
+    cached: bool = Field(False, description="Served from the stored set instead of a new LLM call")
 
 
 class QuizItem(BaseModel):
@@ -58,6 +86,7 @@ class QuizResponse(BaseModel):
     quiz: List[QuizItem]
     document_id: str
     count: int
+    cached: bool = Field(False, description="Served from the stored set instead of a new LLM call")
 
 
 class ChatResponse(BaseModel):
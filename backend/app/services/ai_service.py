@@ -1,12 +1,16 @@
 """AI/LLM service: OpenAI and Google Gemini (free tier) support."""
 
 import asyncio
+import concurrent.futures
 import json
 import re
+import threading
 import traceback
-from typing import AsyncGenerator, List
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncGenerator, Callable, List, Optional, Tuple
 
 from app.config import get_settings
+from app.services.clients import get_registry
 from app.utils.logging_config import get_logger
 
 logger = get_logger("ai")
@@ -18,6 +22,21 @@ QUOTA_EXCEEDED_MESSAGE = (
 )
 
 
+# Bump when the flashcard/quiz prompts change so stored sets are regenerated
+FLASHCARDS_PROMPT_VERSION = 1
+QUIZ_PROMPT_VERSION = 1
+
+
+def generation_model() -> str:
+    """Model that flashcard/quiz generation tries first under the current settings (stored-set lookup key)."""
+    settings = get_settings()
+    provider = (settings.ai_provider or "auto").strip().lower()
+    use_gemini_first = provider == "gemini" or (provider == "auto" and not settings.openai_api_key)
+    if (use_gemini_first and _gemini_available()) or not settings.openai_api_key:
+        return settings.gemini_model
+    return settings.openai_model
+
+
 def _raise_if_quota_error(e: Exception) -> None:
     msg = str(e).lower()
     if "429" in msg or "insufficient_quota" in msg or "quota" in msg or "billing" in msg:
@@ -59,15 +78,53 @@ def _parse_json_array(text: str, label: str) -> List[dict]:
 
 # ---------- Gemini (free tier) ----------
 
+# Max text chunks buffered between the Gemini worker thread and the SSE consumer
+GEMINI_STREAM_QUEUE_SIZE = 64
+
+# Blocking Gemini SDK calls (whole streamed answers included) get their own bounded pool, so they
+# never starve the default executor that Supabase and cache I/O run on.
+_gemini_executor: Optional[ThreadPoolExecutor] = None
+_gemini_executor_lock = threading.Lock()
+
+
+def _get_gemini_executor() -> ThreadPoolExecutor:
+    global _gemini_executor
+    with _gemini_executor_lock:
+        if _gemini_executor is None:
+            _gemini_executor = ThreadPoolExecutor(
+                max_workers=max(1, get_settings().gemini_workers),
+                thread_name_prefix="gemini",
+            )
+        return _gemini_executor
+
+
+def shutdown_gemini_executor() -> None:
+    """Stop the Gemini pool (called on app shutdown); running calls are not waited for."""
+    global _gemini_executor
+    with _gemini_executor_lock:
+        if _gemini_executor is not None:
+            _gemini_executor.shutdown(wait=False, cancel_futures=True)
+            _gemini_executor = None
+
+
+_STREAM_DONE = object()
+
+
+class _StreamError:
+    """Wraps an exception raised in the Gemini worker thread so the consumer can re-raise it."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+
+
 def _gemini_available() -> bool:
     return bool(get_settings().gemini_api_key)
 
 
 def _gemini_generate_sync(prompt: str, system_instruction: str | None = None, max_tokens: int = 2048) -> str:
     """Sync Gemini call (run in executor)."""
-    import google.generativeai as genai
+    genai = get_registry().gemini()
     settings = get_settings()
-    genai.configure(api_key=settings.gemini_api_key)
     model = genai.GenerativeModel(
         settings.gemini_model,
         system_instruction=system_instruction or "You are a helpful assistant. Respond with clear, concise text.",
@@ -84,20 +141,17 @@ def _gemini_generate_sync(prompt: str, system_instruction: str | None = None, ma
     return response.text.strip()
 
 
-def _gemini_stream_sync(prompt: str, system_instruction: str | None) -> List[str]:
-    """Sync Gemini stream; returns list of text chunks (run in executor)."""
-    import google.generativeai as genai
+def _gemini_stream_sync(prompt: str, system_instruction: str | None, emit: Callable[[str], bool]) -> None:
+    """Sync Gemini stream; hands each text chunk to emit, stopping when it returns False (run in executor)."""
+    genai = get_registry().gemini()
     settings = get_settings()
-    genai.configure(api_key=settings.gemini_api_key)
     model = genai.GenerativeModel(
         settings.gemini_model,
         system_instruction=system_instruction or "You are a helpful assistant.",
     )
-    chunks = []
     for chunk in model.generate_content(prompt, stream=True):
-        if chunk.text:
-            chunks.append(chunk.text)
-    return chunks
+        if chunk.text and not emit(chunk.text):
+            break
 
 
 async def _generate_flashcards_gemini(content: str, document_id: str) -> List[dict]:
@@ -110,7 +164,7 @@ Return ONLY a valid JSON array, no markdown: [{"question": "...", "answer": "...
     user = f"Create flashcards from this content:\n\n{truncated}\n\nReturn a JSON array of flashcards."
     loop = asyncio.get_event_loop()
     text = await loop.run_in_executor(
-        None,
+        _get_gemini_executor(),
         lambda: _gemini_generate_sync(user, system, max_tokens=2000),
     )
     return _parse_json_array(text or "[]", "flashcards")
@@ -136,10 +190,10 @@ Return ONLY a raw JSON array, no markdown: [{"question": "...", "options": ["opt
             item.setdefault("explanation", "")
         return items
 
-    items = await loop.run_in_executor(None, _run_once)
+    items = await loop.run_in_executor(_get_gemini_executor(), _run_once)
     if not items:
         logger.info("Quiz parse returned empty, retrying once")
-        items = await loop.run_in_executor(None, _run_once)
+        items = await loop.run_in_executor(_get_gemini_executor(), _run_once)
     return items
 
 
@@ -157,21 +211,55 @@ Context:
         else:
             parts.append(f"Assistant: {content}")
     prompt = "\n\n".join(parts) if parts else "Hello"
+
+    # Bridge the SDK's blocking iterator to this async generator through a bounded queue:
+    # the worker thread blocks when the consumer falls behind, and stops as soon as the
+    # consumer goes away (client disconnect cancels the SSE generator).
     loop = asyncio.get_event_loop()
-    chunks = await loop.run_in_executor(
-        None,
-        lambda: _gemini_stream_sync(prompt, system),
-    )
-    for chunk in chunks:
-        yield chunk
+    queue: asyncio.Queue = asyncio.Queue(maxsize=GEMINI_STREAM_QUEUE_SIZE)
+    cancelled = threading.Event()
+
+    def _emit(item: object) -> bool:
+        if cancelled.is_set():
+            return False
+        fut = asyncio.run_coroutine_threadsafe(queue.put(item), loop)
+        while True:
+            try:
+                fut.result(timeout=0.5)
+                return not cancelled.is_set()
+            except concurrent.futures.TimeoutError:
+                if cancelled.is_set():
+                    fut.cancel()
+                    return False
+            except Exception:
+                return False
+
+    def _produce() -> None:
+        try:
+            _gemini_stream_sync(prompt, system, _emit)
+        except Exception as e:
+            _emit(_StreamError(e))
+        finally:
+            _emit(_STREAM_DONE)
+
+    loop.run_in_executor(_get_gemini_executor(), _produce)
+    try:
+        while True:
+            item = await queue.get()
+            if item is _STREAM_DONE:
+                break
+            if isinstance(item, _StreamError):
+                raise item.error
+            yield item
+    finally:
+        cancelled.set()
 
 
 # ---------- OpenAI ----------
 
 async def _generate_flashcards_openai(content: str, document_id: str) -> List[dict]:
-    from openai import AsyncOpenAI
     settings = get_settings()
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_registry().openai()
     max_chars = 12000
     truncated = content[:max_chars] + ("..." if len(content) > max_chars else "")
     system = """You are an expert educational content designer. Generate high-quality flashcards from the given learning material.
@@ -187,9 +275,8 @@ Rules: 10-15 flashcards, clear questions, concise answers, no duplicates. Return
 
 
 async def _generate_quiz_openai(content: str, document_id: str) -> List[dict]:
-    from openai import AsyncOpenAI
     settings = get_settings()
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_registry().openai()
     max_chars = 12000
     truncated = content[:max_chars] + ("..." if len(content) > max_chars else "")
     system = """You are an expert quiz designer. Create MCQs from the material. 5-10 questions, 4 options, correctAnswer A/B/C/D, include explanation. Return ONLY a valid JSON array."""
@@ -210,9 +297,8 @@ async def _generate_quiz_openai(content: str, document_id: str) -> List[dict]:
 
 
 async def _chat_stream_openai(messages: List[dict], context: str) -> AsyncGenerator[str, None]:
-    from openai import AsyncOpenAI
     settings = get_settings()
-    client = AsyncOpenAI(api_key=settings.openai_api_key)
+    client = get_registry().openai()
     system_content = f"""You are SaiV. Answer based ONLY on this context. If not in context, say you're not sure. Be concise.
 
 Context:
@@ -234,14 +320,15 @@ Context:
 
 # ---------- Public API (auto fallback: OpenAI → Gemini) ----------
 
-async def generate_flashcards(content: str, document_id: str) -> List[dict]:
+async def generate_flashcards(content: str, document_id: str) -> Tuple[List[dict], str]:
+    """Flashcard items and the model that produced them (the stored-set key; may be the fallback)."""
     settings = get_settings()
     provider = (settings.ai_provider or "auto").strip().lower()
     use_gemini_first = provider == "gemini" or (provider == "auto" and not settings.openai_api_key)
 
     if use_gemini_first and _gemini_available():
         try:
-            return await _generate_flashcards_gemini(content, document_id)
+            return await _generate_flashcards_gemini(content, document_id), settings.gemini_model
         except Exception as e:
             traceback.print_exc()
             logger.warning("Gemini flashcards failed, trying OpenAI", error=str(e))
@@ -250,30 +337,31 @@ async def generate_flashcards(content: str, document_id: str) -> List[dict]:
 
     if settings.openai_api_key:
         try:
-            return await _generate_flashcards_openai(content, document_id)
+            return await _generate_flashcards_openai(content, document_id), settings.openai_model
         except Exception as e:
             traceback.print_exc()
             if _gemini_available():
                 logger.info("OpenAI failed, falling back to Gemini for flashcards", error=str(e))
-                return await _generate_flashcards_gemini(content, document_id)
+                return await _generate_flashcards_gemini(content, document_id), settings.gemini_model
             _raise_if_quota_error(e)
             raise ValueError(f"AI generation failed: {e}") from e
 
     if _gemini_available():
-        return await _generate_flashcards_gemini(content, document_id)
+        return await _generate_flashcards_gemini(content, document_id), settings.gemini_model
     raise ValueError(
         "No AI provider configured. Set OPENAI_API_KEY or GEMINI_API_KEY (free at https://aistudio.google.com/apikey) in .env"
     )
 
 
-async def generate_quiz(content: str, document_id: str) -> List[dict]:
+async def generate_quiz(content: str, document_id: str) -> Tuple[List[dict], str]:
+    """Quiz items and the model that produced them (the stored-set key; may be the fallback)."""
     settings = get_settings()
     provider = (settings.ai_provider or "auto").strip().lower()
     use_gemini_first = provider == "gemini" or (provider == "auto" and not settings.openai_api_key)
 
     if use_gemini_first and _gemini_available():
         try:
-            return await _generate_quiz_gemini(content, document_id)
+            return await _generate_quiz_gemini(content, document_id), settings.gemini_model
         except Exception as e:
             traceback.print_exc()
             if provider == "gemini":
@@ -282,17 +370,17 @@ async def generate_quiz(content: str, document_id: str) -> List[dict]:
 
     if settings.openai_api_key:
         try:
-            return await _generate_quiz_openai(content, document_id)
+            return await _generate_quiz_openai(content, document_id), settings.openai_model
         except Exception as e:
             traceback.print_exc()
             if _gemini_available():
                 logger.info("OpenAI failed, falling back to Gemini for quiz", error=str(e))
-                return await _generate_quiz_gemini(content, document_id)
+                return await _generate_quiz_gemini(content, document_id), settings.gemini_model
             _raise_if_quota_error(e)
             raise ValueError(f"AI generation failed: {e}") from e
 
     if _gemini_available():
-        return await _generate_quiz_gemini(content, document_id)
+        return await _generate_quiz_gemini(content, document_id), settings.gemini_model
     raise ValueError(
         "No AI provider configured. Set OPENAI_API_KEY or GEMINI_API_KEY (free at https://aistudio.google.com/apikey) in .env"
     )
@@ -302,28 +390,37 @@ async def chat_completion_stream(
     messages: List[dict],
     context: str,
 ) -> AsyncGenerator[str, None]:
+    """
+    Stream the answer from the configured provider, falling back to the other one only while nothing
+    has been sent yet; a stream that fails part-way raises instead of starting a second answer.
+    """
     settings = get_settings()
     provider = (settings.ai_provider or "auto").strip().lower()
     use_gemini_first = provider == "gemini" or (provider == "auto" and not settings.openai_api_key)
+    sent = False
 
     if use_gemini_first and _gemini_available():
         try:
             async for chunk in _chat_stream_gemini(messages, context):
+                sent = True
                 yield chunk
             return
         except Exception as e:
             traceback.print_exc()
-            if provider == "gemini":
+            if provider == "gemini" or sent:
                 raise ValueError(f"Chat failed: {e}") from e
             logger.warning("Gemini chat failed, trying OpenAI", error=str(e))
 
     if settings.openai_api_key:
         try:
             async for chunk in _chat_stream_openai(messages, context):
+                sent = True
                 yield chunk
             return
         except Exception as e:
             traceback.print_exc()
+            if sent:
+                raise ValueError(f"Chat failed: {e}") from e
             if _gemini_available():
                 logger.info("OpenAI failed, falling back to Gemini for chat", error=str(e))
                 async for chunk in _chat_stream_gemini(messages, context):
@@ -0,0 +1,106 @@
+"""Process-wide provider clients (OpenAI, Gemini) shared by AI and embedding services.
+
+The registry is created in the app lifespan and closed on shutdown, so every request
+reuses the same keep-alive connection pools instead of paying a new TLS handshake.
+"""
+
+import threading
+from typing import Any, Optional
+
+import httpx
+
+from app.config import Settings, get_settings
+from app.utils.logging_config import get_logger
+
+logger = get_logger("clients")
+
+
+class ProviderRegistry:
+    """Owns long-lived LLM/embedding clients. Clients are created lazily on first use."""
+
+    def __init__(self, settings: Settings):
+        self._settings = settings
+        self._lock = threading.Lock()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._openai: Any = None
+        self._gemini: Any = None
+
+    def _limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self._settings.http_max_connections,
+            max_keepalive_connections=self._settings.http_max_keepalive_connections,
+            keepalive_expiry=self._settings.http_keepalive_expiry_seconds,
+        )
+
+    def _timeout(self) -> httpx.Timeout:
+        return httpx.Timeout(
+            self._settings.http_timeout_seconds,
+            connect=self._settings.http_connect_timeout_seconds,
+        )
+
+    def http(self) -> httpx.AsyncClient:
+        """Shared pooled httpx client for direct provider REST calls."""
+        with self._lock:
+            if self._http is None:
+                self._http = httpx.AsyncClient(limits=self._limits(), timeout=self._timeout())
+            return self._http
+
+    def openai(self):
+        """Shared AsyncOpenAI client backed by its own keep-alive connection pool."""
+        with self._lock:
+            if self._openai is None:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+                self._openai = AsyncOpenAI(
+                    api_key=self._settings.openai_api_key,
+                    http_client=DefaultAsyncHttpxClient(limits=self._limits(), timeout=self._timeout()),
+                )
+            return self._openai
+
+    def gemini(self):
+        """google.generativeai module, configured once (configure() rebuilds the SDK's channels)."""
+        with self._lock:
+            if self._gemini is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=self._settings.gemini_api_key)
+                self._gemini = genai
+            return self._gemini
+
+    async def aclose(self) -> None:
+        """Close pooled connections. Safe to call more than once."""
+        with self._lock:
+            http, openai_client = self._http, self._openai
+            self._http = None
+            self._openai = None
+            self._gemini = None
+        if openai_client is not None:
+            await openai_client.close()
+        if http is not None:
+            await http.aclose()
+
+
+_registry: Optional[ProviderRegistry] = None
+
+
+def init_registry(settings: Optional[Settings] = None) -> ProviderRegistry:
+    """Create the process-wide registry (called from the app lifespan)."""
+    global _registry
+    _registry = ProviderRegistry(settings or get_settings())
+    return _registry
+
+
+def get_registry() -> ProviderRegistry:
+    """Return the process-wide registry, creating it if the lifespan has not run (e.g. scripts)."""
+    if _registry is None:
+        return init_registry()
+    return _registry
+
+
+async def close_registry() -> None:
+    """Close the process-wide registry (called on app shutdown)."""
+    global _registry
+    if _registry is not None:
+        await _registry.aclose()
+        _registry = None
+        logger.info("Provider clients closed")
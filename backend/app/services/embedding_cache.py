@@ -0,0 +1,83 @@
+"""Content-addressed embedding cache (a TieredCache: memory LRU over SQLite).
+
+Entries are keyed by (provider, model, dimensions, sha256(text)), so re-processing the same
+PDF or video only sends never-seen chunks to the embedding provider.
+"""
+
+import hashlib
+import sqlite3
+import threading
+from typing import Optional, Tuple
+
+import numpy as np
+from app.config import get_settings
+from app.utils.cache import TieredCache
+from app.utils.logging_config import get_logger
+
+logger = get_logger("embedding_cache")
+
+CacheKey = Tuple[str, str, int, str]
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _to_blob(vector: np.ndarray) -> bytes:
+    return np.ascontiguousarray(vector, dtype="<f4").tobytes()
+
+
+def _from_blob(blob: bytes) -> np.ndarray:
+    return np.frombuffer(blob, dtype="<f4")
+
+
+class EmbeddingCache(TieredCache):
+    """Two-tier embedding cache; vectors are stored as little-endian float32 blobs."""
+
+    table = "embeddings"
+    create_sql = """CREATE TABLE IF NOT EXISTS embeddings (
+        provider TEXT NOT NULL,
+        model TEXT NOT NULL,
+        dimensions INTEGER NOT NULL,
+        text_hash TEXT NOT NULL,
+        vector BLOB NOT NULL,
+        PRIMARY KEY (provider, model, dimensions, text_hash)
+    )"""
+    key_columns = ("provider", "model", "dimensions", "text_hash")
+    value_columns = ("vector",)
+
+    def _to_row(self, value: np.ndarray) -> tuple:
+        return (_to_blob(value),)
+
+    def _from_row(self, row: tuple) -> np.ndarray:
+        return _from_blob(row[0])
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """Process-wide cache, or None when disabled or the store cannot be opened."""
+    global _cache, _cache_failed
+    settings = get_settings()
+    if not settings.embedding_cache_enabled or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = EmbeddingCache(settings.embedding_cache_path, settings.embedding_cache_memory_items)
+                except (sqlite3.Error, OSError) as e:
+                    _cache_failed = True
+                    logger.warning("Embedding cache unavailable; embedding without cache", error=str(e))
+    return _cache
+
+
+def close_embedding_cache() -> None:
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
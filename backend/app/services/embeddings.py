@@ -1,127 +1,328 @@
 """Embedding generation service: OpenAI, Gemini (free), and optional local (fastembed) fallback."""
 
 import asyncio
-import math
+import base64
+import threading
 import traceback
-from typing import List
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 from app.config import get_settings
+from app.services.clients import get_registry
+from app.services.embedding_cache import get_embedding_cache, text_hash
+from app.utils.cache import LRUCache
 from app.utils.logging_config import get_logger
+from app.utils.rate_limit import TokenBucket, is_transient_error, retry_with_backoff
 
 logger = get_logger("embeddings")
 
 # gemini-embedding-001 default is 3072; we request 1536 via output_dimensionality or pad to target_dim
 GEMINI_EMBED_DIM = 3072
 # Local model output dimension (fastembed BAAI/bge-small-en-v1.5)
+LOCAL_EMBED_MODEL = "BAAI/bge-small-en-v1.5"
 LOCAL_EMBED_DIM = 384
 
+# progress(done, total) for generate_embeddings; progress(n_just_embedded) for provider batches
+EmbeddingProgress = Callable[[int, int], None]
+BatchProgress = Callable[[int], None]
+
+# Texts per provider embedding request
+EMBED_BATCH_SIZE = 100
+
+# Gemini REST endpoint for batchEmbedContents (called directly on the shared httpx pool)
+GEMINI_API_BASE = "https://generativelanguage.googleapis.com/v1beta"
+
+_local_model = None
+_local_model_lock = threading.Lock()
+_limiters: Dict[str, TokenBucket] = {}
+_query_cache: Optional[LRUCache] = None
+_query_cache_lock = threading.Lock()
+
+
+def _empty(target_dim: int) -> np.ndarray:
+    return np.zeros((0, target_dim), dtype=np.float32)
+
+
+def _pad_and_normalize(vectors: Union[np.ndarray, Sequence[Sequence[float]]], target_dim: int) -> np.ndarray:
+    """Pad or truncate vectors to target_dim and L2-normalize. Returns an (n, target_dim) float32 matrix."""
+    mat = np.asarray(vectors, dtype=np.float32)
+    if mat.size == 0:
+        return _empty(target_dim)
+    if mat.ndim == 1:
+        mat = mat.reshape(1, -1)
+    out = np.zeros((mat.shape[0], target_dim), dtype=np.float32)
+    width = min(mat.shape[1], target_dim)
+    out[:, :width] = mat[:, :width]
+    norms = np.linalg.norm(out, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    out /= norms
+    return out
+
+
+def to_wire(vector: np.ndarray) -> List[float]:
+    """Convert one embedding to the JSON list sent to Supabase (7 decimals keeps float32 precision, halves payload)."""
+    return np.round(vector.astype(np.float64), 7).tolist()
+
+
+def to_bit_string(vector: np.ndarray) -> str:
+    """Sign-quantize one embedding to a pgvector bit literal ("1" where x > 0, like binary_quantize())."""
+    return ((vector > 0).astype(np.uint8) + ord("0")).tobytes().decode("ascii")
+
+
+def _decode_openai_embedding(value: Union[str, Sequence[float]]) -> np.ndarray:
+    """OpenAI returns little-endian float32 base64 when encoding_format="base64"."""
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype="<f4")
+    return np.asarray(value, dtype=np.float32)
+
+
+def _get_local_model():
+    """Load the fastembed model once per process; the ONNX session is safe to share across threads."""
+    global _local_model
+    if _local_model is not None:
+        return _local_model
+    with _local_model_lock:
+        if _local_model is None:
+            try:
+                from fastembed import TextEmbedding
+            except ImportError:
+                raise ValueError(
+                    "Local embedding fallback requires 'fastembed'. Install with: pip install fastembed. "
+                    "Or set OPENAI_API_KEY / use Gemini and disable EMBEDDING_FALLBACK_TO_LOCAL on hosted deployments."
+                ) from None
+            threads = get_settings().local_embedding_threads or None
+            _local_model = TextEmbedding(model_name=LOCAL_EMBED_MODEL, max_length=512, threads=threads)
+            logger.info("Local embedding model loaded", model=LOCAL_EMBED_MODEL, threads=threads)
+        return _local_model
+
+
+def preload_local_embedding_model() -> None:
+    """Load the local model and run a warmup embedding so the first request doesn't pay for it."""
+    try:
+        list(_get_local_model().embed(["warmup"]))
+    except Exception as e:
+        logger.warning("Local embedding model preload failed", error=str(e))
+
 
-def _pad_and_normalize(vectors: List[List[float]], target_dim: int) -> List[List[float]]:
-    """Pad or truncate vectors to target_dim and L2-normalize."""
-    result: List[List[float]] = []
-    for arr in vectors:
-        if len(arr) < target_dim:
-            arr = arr + [0.0] * (target_dim - len(arr))
+def _embed_local_sync(texts: List[str], target_dim: int) -> np.ndarray:
+    """Generate embeddings using fastembed (sync). Pads to target_dim and L2-normalizes."""
+    model = _get_local_model()
+    # embed returns an iterable of ndarrays; L2-normalize after padding so cosine similarity stays correct
+    raw = np.stack(list(model.embed(texts)))
+    return _pad_and_normalize(raw, target_dim)
+
+
+def _gemini_available() -> bool:
+    return bool(get_settings().gemini_api_key)
+
+
+def _get_limiter(provider: str) -> TokenBucket:
+    """Per-provider requests/min + tokens/min limiter, shared by all requests in the process."""
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        settings = get_settings()
+        if provider == "openai":
+            limiter = TokenBucket(settings.openai_embedding_rpm, settings.openai_embedding_tpm)
         else:
-            arr = arr[:target_dim]
-        norm = math.sqrt(sum(x * x for x in arr)) or 1.0
-        result.append([x / norm for x in arr])
-    return result
+            limiter = TokenBucket(settings.gemini_embedding_rpm, settings.gemini_embedding_tpm)
+        _limiters[provider] = limiter
+    return limiter
+
+
+def _estimate_tokens(texts: List[str]) -> int:
+    # ~4 characters per token for English text; only used for client-side rate limiting
+    return sum(len(t) // 4 + 1 for t in texts)
+
 
+async def _dispatch_batches(
+    provider: str,
+    texts: List[str],
+    target_dim: int,
+    embed_batch: Callable[[List[str], int], Awaitable[np.ndarray]],
+    progress: Optional[BatchProgress] = None,
+) -> np.ndarray:
+    """
+    Embed texts in EMBED_BATCH_SIZE batches, up to embedding_max_concurrency in flight.
+    Every attempt waits on the provider's rate limiter; 429s, 5xx and connection errors back off with jitter.
+    Results are written into their input positions, so order is preserved.
+    progress(n) is called as each batch of n texts completes.
+    """
+    settings = get_settings()
+    limiter = _get_limiter(provider)
+    semaphore = asyncio.Semaphore(max(1, settings.embedding_max_concurrency))
+    out = np.empty((len(texts), target_dim), dtype=np.float32)
+
+    async def _run(start: int) -> None:
+        batch = texts[start : start + EMBED_BATCH_SIZE]
+        tokens = _estimate_tokens(batch)
+
+        async def _attempt() -> np.ndarray:
+            await limiter.acquire(tokens)
+            return await embed_batch(batch, target_dim)
 
-def _embed_gemini_sync(texts: List[str], target_dim: int) -> List[List[float]]:
-    """Generate embeddings using Gemini (sync). Pads to target_dim and L2-normalizes."""
-    import google.generativeai as genai
-    from google.generativeai import embedding as genai_embedding
+        async with semaphore:
+            vectors = await retry_with_backoff(
+                _attempt, max_retries=settings.embedding_max_retries, is_retryable=is_transient_error
+            )
+        if len(vectors) != len(batch):
+            raise ValueError(f"{provider} returned {len(vectors)} embeddings for {len(batch)} texts")
+        out[start : start + len(batch)] = vectors
+        if progress:
+            progress(len(batch))
 
+    tasks = [asyncio.ensure_future(_run(i)) for i in range(0, len(texts), EMBED_BATCH_SIZE)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+    return out
+
+
+async def _embed_gemini_batch(texts: List[str], target_dim: int) -> np.ndarray:
+    """One Gemini batchEmbedContents call over the pooled async HTTP client. Pads to target_dim and L2-normalizes."""
     settings = get_settings()
-    genai.configure(api_key=settings.gemini_api_key)
     model = settings.gemini_embedding_model
-    # Batch in sizes the API accepts; request 1536 dims when supported (gemini-embedding-001)
-    batch_size = 100
-    all_embeddings: List[List[float]] = []
-    kwargs = {"model": model, "content": None, "task_type": "retrieval_document"}
+    if not model.startswith("models/"):
+        model = f"models/{model}"
+    request = {"model": model, "taskType": "RETRIEVAL_DOCUMENT"}
+    # Request 1536 dims when supported (gemini-embedding-001)
     if target_dim in (768, 1536, 3072):
-        kwargs["output_dimensionality"] = target_dim
-    for i in range(0, len(texts), batch_size):
-        batch = texts[i : i + batch_size]
-        kwargs["content"] = batch
-        result = genai_embedding.embed_content(**kwargs)
-        # result["embedding"] is list of lists for batch input, or single list for one text
-        batch_emb = result.get("embedding", [])
-        if batch_emb and isinstance(batch_emb[0], (int, float)):
-            batch_emb = [batch_emb]
-        all_embeddings.extend(batch_emb)
-    return _pad_and_normalize(all_embeddings, target_dim)
-
-
-def _embed_local_sync(texts: List[str], target_dim: int) -> List[List[float]]:
-    """Generate embeddings using fastembed (sync). Pads to target_dim and L2-normalizes."""
-    try:
-        from fastembed import TextEmbedding
-    except ImportError:
-        raise ValueError(
-            "Local embedding fallback requires 'fastembed'. Install with: pip install fastembed. "
-            "Or set OPENAI_API_KEY / use Gemini and disable EMBEDDING_FALLBACK_TO_LOCAL on hosted deployments."
-        ) from None
-
-    model = TextEmbedding(model_name="BAAI/bge-small-en-v1.5", max_length=512)
-    # embed returns an iterable of ndarrays
-    raw = list(model.embed(texts))
-    result: List[List[float]] = []
-    for vec in raw:
-        arr = vec.tolist() if hasattr(vec, "tolist") else list(vec)
-        # Pad to target_dim with zeros
-        if len(arr) < target_dim:
-            arr = arr + [0.0] * (target_dim - len(arr))
-        else:
-            arr = arr[:target_dim]
-        # L2-normalize so cosine similarity works correctly with padded vectors
-        norm = math.sqrt(sum(x * x for x in arr)) or 1.0
-        result.append([x / norm for x in arr])
-    return result
+        request["outputDimensionality"] = target_dim
+    response = await get_registry().http().post(
+        f"{GEMINI_API_BASE}/{model}:batchEmbedContents",
+        headers={"x-goog-api-key": settings.gemini_api_key},
+        json={"requests": [{**request, "content": {"parts": [{"text": t}]}} for t in texts]},
+    )
+    response.raise_for_status()
+    embeddings = response.json().get("embeddings") or []
+    if len(embeddings) != len(texts):
+        raise ValueError(f"Gemini returned {len(embeddings)} embeddings for {len(texts)} texts")
+    return _pad_and_normalize([e.get("values") or [] for e in embeddings], target_dim)
 
 
-def _gemini_available() -> bool:
-    return bool(get_settings().gemini_api_key)
+async def _embed_openai_batch(texts: List[str], target_dim: int) -> np.ndarray:
+    """One OpenAI batch, fetched as base64 float32 to skip JSON float parsing."""
+    settings = get_settings()
+    # _dispatch_batches owns retries for embedding batches, so the SDK's own retry layer is off here
+    client = get_registry().openai().with_options(max_retries=0)
+    response = await client.embeddings.create(
+        model=settings.embedding_model,
+        input=texts,
+        dimensions=target_dim,
+        encoding_format="base64",
+    )
+    out = np.empty((len(response.data), target_dim), dtype=np.float32)
+    for j, item in enumerate(sorted(response.data, key=lambda d: d.index)):
+        out[j] = _decode_openai_embedding(item.embedding)
+    return out
+
+
+async def _generate_embeddings_gemini(
+    texts: List[str], target_dim: int, progress: Optional[BatchProgress] = None
+) -> np.ndarray:
+    return await _dispatch_batches("gemini", texts, target_dim, _embed_gemini_batch, progress)
+
+
+async def _generate_embeddings_openai(
+    texts: List[str], target_dim: int, progress: Optional[BatchProgress] = None
+) -> np.ndarray:
+    return await _dispatch_batches("openai", texts, target_dim, _embed_openai_batch, progress)
 
 
-async def _generate_embeddings_gemini(texts: List[str], target_dim: int) -> List[List[float]]:
-    """Run sync Gemini embedding in executor."""
+async def _generate_embeddings_local(
+    texts: List[str], target_dim: int, progress: Optional[BatchProgress] = None
+) -> np.ndarray:
+    """Run local fastembed in executor."""
     loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
+    vectors = await loop.run_in_executor(
         None,
-        lambda: _embed_gemini_sync(texts, target_dim),
+        lambda: _embed_local_sync(texts, target_dim),
     )
+    if progress:
+        progress(len(texts))
+    return vectors
+
+
+async def _embed_with_cache(
+    provider: str,
+    model: str,
+    texts: List[str],
+    target_dim: int,
+    embed: Callable[..., Awaitable[np.ndarray]],
+    progress: Optional[EmbeddingProgress] = None,
+) -> np.ndarray:
+    """Serve cached vectors and send only cache misses (deduplicated) to the provider."""
+    total = len(texts)
+    done = 0
+
+    def _advance(n: int) -> None:
+        nonlocal done
+        done = min(total, done + n)
+        if progress:
+            progress(done, total)
+
+    cache = get_embedding_cache()
+    if cache is None:
+        return await embed(texts, target_dim, _advance)
 
+    keys = [(provider, model, target_dim, text_hash(t)) for t in texts]
+    found = await cache.get_many(keys)
+    missing = {key: text for key, text in zip(keys, texts) if key not in found}
+    _advance(sum(1 for key in keys if key in found))
+    if missing:
+        vectors = await embed(list(missing.values()), target_dim, _advance)
+        if len(vectors) != len(missing):
+            raise ValueError(f"Embedding provider returned {len(vectors)} vectors for {len(missing)} texts")
+        fresh = dict(zip(missing.keys(), vectors))
+        await cache.put_many(fresh)
+        found.update(fresh)
+    logger.info("Embedding cache lookup", provider=provider, texts=len(texts), misses=len(missing))
+    out = np.empty((len(keys), target_dim), dtype=np.float32)
+    for i, key in enumerate(keys):
+        out[i] = found[key]
+    return out
 
-async def generate_embeddings(texts: List[str]) -> List[List[float]]:
+
+async def generate_embeddings(texts: List[str], progress: Optional[EmbeddingProgress] = None) -> np.ndarray:
     """
-    Generate embeddings for a list of text chunks.
+    Generate embeddings for a list of text chunks as an (n, embedding_dimensions) float32 matrix.
     Order: OpenAI (if key set) -> on failure or no key, Gemini (if key set) -> else local fastembed if enabled.
+    Each provider serves what it can from the embedding cache; only misses are sent to it.
+    progress(done, total) is called as texts are resolved.
     """
-    if not texts:
-        return []
+    vectors, _ = await _generate_embeddings_with_source(texts, progress)
+    return vectors
+
 
+def _preferred_embedding_source() -> Tuple[str, str]:
+    """(provider, model) that generate_embeddings tries first under the current settings."""
+    settings = get_settings()
+    if settings.openai_api_key:
+        return "openai", settings.embedding_model
+    if _gemini_available():
+        return "gemini", settings.gemini_embedding_model
+    return "local", LOCAL_EMBED_MODEL
+
+
+async def _generate_embeddings_with_source(
+    texts: List[str], progress: Optional[EmbeddingProgress] = None
+) -> Tuple[np.ndarray, Tuple[str, str]]:
+    """generate_embeddings plus the (provider, model) that actually produced the vectors."""
     settings = get_settings()
     target_dim = settings.embedding_dimensions
+    if not texts:
+        return _empty(target_dim), _preferred_embedding_source()
 
     # 1) Try OpenAI when key is set
     if settings.openai_api_key:
         try:
-            from openai import AsyncOpenAI
-            client = AsyncOpenAI(api_key=settings.openai_api_key)
-            batch_size = 100
-            all_embeddings: List[List[float]] = []
-            for i in range(0, len(texts), batch_size):
-                batch = texts[i : i + batch_size]
-                response = await client.embeddings.create(
-                    model=settings.embedding_model,
-                    input=batch,
-                    dimensions=settings.embedding_dimensions,
-                )
-                all_embeddings.extend([item.embedding for item in response.data])
-            return all_embeddings
+            vectors = await _embed_with_cache(
+                "openai", settings.embedding_model, texts, target_dim, _generate_embeddings_openai, progress
+            )
+            return vectors, ("openai", settings.embedding_model)
         except Exception as e:
             traceback.print_exc()
             err_str = str(e).lower()
@@ -137,7 +338,10 @@ async def generate_embeddings(texts: List[str]) -> List[List[float]]:
     # 2) Try Gemini (free tier) when key is set
     if _gemini_available():
         try:
-            return await _generate_embeddings_gemini(texts, target_dim)
+            vectors = await _embed_with_cache(
+                "gemini", settings.gemini_embedding_model, texts, target_dim, _generate_embeddings_gemini, progress
+            )
+            return vectors, ("gemini", settings.gemini_embedding_model)
         except Exception as e:
             traceback.print_exc()
             logger.warning("Gemini embedding failed", error=str(e))
@@ -151,8 +355,50 @@ async def generate_embeddings(texts: List[str]) -> List[List[float]]:
             ) from None
 
     # 3) Local fallback (fastembed) if enabled
-    loop = asyncio.get_event_loop()
-    return await loop.run_in_executor(
-        None,
-        lambda: _embed_local_sync(texts, target_dim),
+    vectors = await _embed_with_cache(
+        "local", LOCAL_EMBED_MODEL, texts, target_dim, _generate_embeddings_local, progress
     )
+    return vectors, ("local", LOCAL_EMBED_MODEL)
+
+
+def get_query_embedding_cache() -> Optional[LRUCache]:
+    """Process-wide (provider, model, dimensions, normalized query) -> embedding LRU, or None when disabled."""
+    global _query_cache
+    settings = get_settings()
+    if settings.query_embedding_cache_items <= 0:
+        return None
+    if _query_cache is None:
+        with _query_cache_lock:
+            if _query_cache is None:
+                _query_cache = LRUCache(
+                    settings.query_embedding_cache_items,
+                    ttl_seconds=settings.query_embedding_cache_ttl_seconds or None,
+                )
+    return _query_cache
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different phrasings share a cache entry."""
+    return " ".join(query.split()).casefold()
+
+
+async def embed_query(query: str) -> np.ndarray:
+    """
+    Embedding for a chat/retrieval query, served from the in-memory query cache when possible.
+    The query is embedded as written; only the cache key is normalized. Keys carry the provider and
+    model, and a vector is stored under the provider that actually produced it, so a fallback
+    provider's vector (a different embedding space) is never served in place of the preferred one.
+    """
+    settings = get_settings()
+    cache = get_query_embedding_cache()
+    normalized = normalize_query(query)
+    if cache is not None:
+        cached = cache.get((*_preferred_embedding_source(), settings.embedding_dimensions, normalized))
+        if cached is not None:
+            return cached
+    vectors, source = await _generate_embeddings_with_source([query])
+    vector = vectors[0]
+    vector.setflags(write=False)  # shared between requests
+    if cache is not None:
+        cache.set((*source, settings.embedding_dimensions, normalized), vector)
+    return vector
@@ -0,0 +1,162 @@
+"""Persisted flashcard/quiz sets keyed by (document_id, kind, prompt_version, model).
+
+Document content never changes after ingestion, so a generated set stays valid until the prompt
+or the model changes. Stored in Supabase (generated_sets table) or, for local development,
+a SQLite file. Store errors are logged and treated as misses; they never fail a request.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+
+from app.config import get_settings
+from app.services.rag_service import run_supabase
+from app.utils.logging_config import get_logger
+
+logger = get_logger("generation_cache")
+
+# (document_id, kind, prompt_version, model)
+GenerationKey = Tuple[str, str, int, str]
+
+KIND_FLASHCARDS = "flashcards"
+KIND_QUIZ = "quiz"
+
+
+class SupabaseGenerationStore:
+    """Sets stored in the generated_sets table (see database/schema.sql); rows cascade with their document."""
+
+    def get(self, key: GenerationKey) -> Optional[List[dict]]:
+        document_id, kind, prompt_version, model = key
+        result = run_supabase(
+            lambda client: client.table("generated_sets")
+            .select("items")
+            .eq("document_id", document_id)
+            .eq("kind", kind)
+            .eq("prompt_version", prompt_version)
+            .eq("model", model)
+            .limit(1)
+            .execute()
+        )
+        return result.data[0]["items"] if result.data else None
+
+    def put(self, key: GenerationKey, items: List[dict]) -> None:
+        document_id, kind, prompt_version, model = key
+        row = {
+            "document_id": document_id,
+            "kind": kind,
+            "prompt_version": prompt_version,
+            "model": model,
+            "items": items,
+        }
+        # An upsert on the natural key is idempotent, so it is safe to replay after a reconnect
+        run_supabase(
+            lambda client: client.table("generated_sets")
+            .upsert(row, on_conflict="document_id,kind,prompt_version,model")
+            .execute()
+        )
+
+
+class SQLiteGenerationStore:
+    """Local stand-in for the generated_sets table."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS generated_sets (
+                    document_id TEXT NOT NULL,
+                    kind TEXT NOT NULL,
+                    prompt_version INTEGER NOT NULL,
+                    model TEXT NOT NULL,
+                    items TEXT NOT NULL,
+                    PRIMARY KEY (document_id, kind, prompt_version, model)
+                )"""
+            )
+            self._conn.commit()
+
+    def get(self, key: GenerationKey) -> Optional[List[dict]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT items FROM generated_sets WHERE document_id = ? AND kind = ? AND prompt_version = ? AND model = ?",
+                key,
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key: GenerationKey, items: List[dict]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO generated_sets (document_id, kind, prompt_version, model, items) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, json.dumps(items)),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def _create_store():
+    settings = get_settings()
+    kind = (settings.generation_store or "supabase").strip().lower()
+    if kind == "off":
+        return None
+    if kind == "sqlite":
+        return SQLiteGenerationStore(settings.generation_store_path)
+    return SupabaseGenerationStore()
+
+
+def _get_store():
+    """Process-wide store, or None when disabled or it cannot be opened (False marks "no store")."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            try:
+                _store = _create_store() or False
+            except (sqlite3.Error, OSError) as e:
+                logger.warning("Generation store unavailable; generating without it", error=str(e))
+                _store = False
+        return _store or None
+
+
+async def get_generated_set(key: GenerationKey) -> Optional[List[dict]]:
+    """Stored items for key, or None (not stored, store disabled, or store unavailable)."""
+    store = _get_store()
+    if store is None:
+        return None
+    loop = asyncio.get_event_loop()
+    try:
+        return await loop.run_in_executor(None, store.get, key)
+    except Exception as e:
+        logger.warning("Generation cache read failed", kind=key[1], error=str(e))
+        return None
+
+
+async def save_generated_set(key: GenerationKey, items: List[dict]) -> None:
+    """Store items for key, replacing any previous set. Failures are logged, not raised."""
+    store = _get_store()
+    if store is None:
+        return
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(None, store.put, key, items)
+    except Exception as e:
+        logger.warning("Generation cache write failed", kind=key[1], error=str(e))
+
+
+def close_generation_store() -> None:
+    global _store
+    with _store_lock:
+        close = getattr(_store, "close", None)
+        if close:
+            close()
+        _store = None
@@ -0,0 +1,122 @@
+"""Ingestion pipelines run by background jobs: extract, chunk, embed, store."""
+
+import hashlib
+import os
+from typing import Optional
+
+from app.schemas.responses import ProcessContentResponse
+from app.services.jobs import STAGE_EXTRACTED, ProgressCallback
+from app.services.pdf_extractor import extract_text_from_pdf_async
+from app.services.rag_service import DocumentExistsError, find_indexed_document, upsert_document
+from app.services.youtube import fetch_transcript_async
+from app.utils.logging_config import get_logger
+
+logger = get_logger("ingestion")
+
+
+def _result(document_id: str, title: str, content: str, chunk_count: int, message: str) -> dict:
+    preview = content[:500] + ("..." if len(content) > 500 else "")
+    return ProcessContentResponse(
+        document_id=document_id,
+        title=title,
+        content_preview=preview,
+        chunk_count=chunk_count,
+        message=message,
+    ).model_dump()
+
+
+def video_content_hash(video_id: str) -> str:
+    """Dedup key for YouTube documents: the same video_id is the same content."""
+    return hashlib.sha256(video_id.encode("utf-8")).hexdigest()
+
+
+def _existing_result(document: dict) -> dict:
+    return _result(
+        document["id"],
+        document["title"],
+        document["content"],
+        document["chunk_count"],
+        "This content was already indexed. Reusing the existing document.",
+    )
+
+
+async def find_existing_result(source_type: str, content_hash: str) -> Optional[dict]:
+    """Result for an already indexed copy of this content, or None. Lookup errors are logged, not raised."""
+    try:
+        document = await find_indexed_document(source_type, content_hash)
+    except Exception as e:
+        logger.warning("Duplicate lookup failed; indexing normally", source_type=source_type, error=str(e))
+        return None
+    if document is None:
+        return None
+    logger.info("Duplicate content; reusing indexed document", source_type=source_type, document_id=document["id"])
+    return _existing_result(document)
+
+
+def _reuse_existing(e: DocumentExistsError) -> dict:
+    """Same content was claimed by another ingestion while this one was running."""
+    if e.document.get("chunk_count") is None:
+        raise ValueError("This content is already being processed. Please try again shortly.") from None
+    logger.info("Duplicate content; reusing indexed document", document_id=e.document["id"])
+    return _existing_result(e.document)
+
+
+async def ingest_pdf(path: str, filename: str, document_id: str, content_hash: str, progress: ProgressCallback) -> dict:
+    """Extract text from a spooled PDF upload and index it for RAG. Deletes the file when done."""
+    try:
+        existing = await find_existing_result("pdf", content_hash)
+        if existing is not None:
+            return existing
+        title, text = await extract_text_from_pdf_async(path, filename)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+    if not text.strip():
+        raise ValueError("No readable text could be extracted from this PDF.")
+    progress(STAGE_EXTRACTED, characters=len(text))
+
+    try:
+        chunk_count = await upsert_document(
+            document_id=document_id,
+            source_type="pdf",
+            source_id=content_hash,
+            title=title,
+            content=text,
+            metadata={"filename": filename},
+            progress=progress,
+            content_hash=content_hash,
+        )
+    except DocumentExistsError as e:
+        return _reuse_existing(e)
+    return _result(document_id, title, text, chunk_count, "PDF processed and indexed successfully.")
+
+
+async def ingest_video(url: str, video_id: str, document_id: str, progress: ProgressCallback) -> dict:
+    """Fetch a YouTube transcript and index it for RAG."""
+    content_hash = video_content_hash(video_id)
+    existing = await find_existing_result("youtube", content_hash)
+    if existing is not None:
+        return existing
+
+    # Fetch transcript (may raise ValueError with a user-friendly message)
+    title, content = await fetch_transcript_async(url)
+    if not content.strip():
+        raise ValueError("Transcript is empty. The video may not have usable captions.")
+    progress(STAGE_EXTRACTED, characters=len(content))
+
+    try:
+        chunk_count = await upsert_document(
+            document_id=document_id,
+            source_type="youtube",
+            source_id=video_id,
+            title=title,
+            content=content,
+            metadata={"url": url, "video_id": video_id},
+            progress=progress,
+            content_hash=content_hash,
+        )
+    except DocumentExistsError as e:
+        return _reuse_existing(e)
+    return _result(document_id, title, content, chunk_count, "Video transcript processed and indexed successfully.")
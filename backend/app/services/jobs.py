@@ -0,0 +1,332 @@
+"""Background ingestion jobs: bounded asyncio worker pool with a pluggable job store.
+
+Routes submit a job and return immediately; workers run the ingestion coroutine and record
+progress (stage + counters) that clients poll via GET /jobs/{id}.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import asdict, dataclass, field, replace
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.config import get_settings
+from app.utils.logging_config import get_logger
+
+logger = get_logger("jobs")
+
+# Ingestion stages, in order
+STAGE_QUEUED = "queued"
+STAGE_EXTRACTED = "extracted"
+STAGE_CHUNKED = "chunked"
+STAGE_EMBEDDING = "embedding"
+STAGE_EMBEDDED = "embedded"
+STAGE_STORED = "stored"
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_SUCCEEDED = "succeeded"
+STATUS_FAILED = "failed"
+
+# Reports progress from inside an ingestion run: progress(stage, **counters)
+ProgressCallback = Callable[..., None]
+JobRunner = Callable[[ProgressCallback], Awaitable[dict]]
+
+# Progress updates reach the job store at most this often (stage changes included)
+PROGRESS_SAVE_INTERVAL_SECONDS = 1.0
+# Finished jobs past retention are pruned on submit, at most this often
+PRUNE_INTERVAL_SECONDS = 60.0
+
+
+class JobQueueFull(Exception):
+    """Raised when the ingestion queue is at capacity."""
+
+
+@dataclass
+class Job:
+    """State of one ingestion job."""
+
+    id: str
+    kind: str
+    document_id: str
+    status: str = STATUS_QUEUED
+    stage: str = STAGE_QUEUED
+    progress: Dict[str, int] = field(default_factory=dict)
+    error: Optional[str] = None
+    result: Optional[dict] = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (STATUS_SUCCEEDED, STATUS_FAILED)
+
+
+class InMemoryJobStore:
+    """Process-local job store (default)."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        with self._lock:
+            self._jobs[job.id] = job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def prune(self, older_than: float) -> None:
+        with self._lock:
+            for job_id in [j.id for j in self._jobs.values() if j.finished and j.updated_at < older_than]:
+                del self._jobs[job_id]
+
+
+class SQLiteJobStore:
+    """Job store persisted to a local SQLite file, so job status survives restarts on a single node."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS jobs (id TEXT PRIMARY KEY, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_updated_at_idx ON jobs (updated_at)")
+            self._conn.commit()
+        self._fail_interrupted()
+
+    def _fail_interrupted(self) -> None:
+        """Jobs left queued/running by a previous process will never finish; mark them failed."""
+        with self._lock:
+            rows = self._conn.execute("SELECT data FROM jobs").fetchall()
+        for (data,) in rows:
+            job = Job(**json.loads(data))
+            if not job.finished:
+                job.status = STATUS_FAILED
+                job.error = "Processing was interrupted by a server restart. Please try again."
+                self.save(job)
+
+    def save(self, job: Job) -> None:
+        job.updated_at = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO jobs (id, data, updated_at) VALUES (?, ?, ?)",
+                (job.id, json.dumps(asdict(job)), job.updated_at),
+            )
+            self._conn.commit()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return Job(**json.loads(row[0])) if row else None
+
+    def prune(self, older_than: float) -> None:
+        # Status is read with SQLite's JSON functions, so rows are not decoded in Python
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM jobs WHERE updated_at < ? AND json_extract(data, '$.status') IN (?, ?)",
+                (older_than, STATUS_SUCCEEDED, STATUS_FAILED),
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class JobQueue:
+    """Bounded queue of ingestion jobs drained by a fixed number of asyncio workers."""
+
+    def __init__(self, store, workers: int, max_queued: int, retention_seconds: int):
+        self.store = store
+        self._num_workers = max(1, workers)
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max(1, max_queued))
+        self._retention_seconds = retention_seconds
+        self._workers: list[asyncio.Task] = []
+        # Coalescing key (normalized source) -> unfinished job for that source
+        self._inflight: Dict[str, Job] = {}
+        self._last_prune = 0.0
+
+    def start(self) -> None:
+        if not self._workers:
+            self._workers = [asyncio.ensure_future(self._worker(i)) for i in range(self._num_workers)]
+            logger.info("Ingestion workers started", workers=self._num_workers)
+
+    async def stop(self) -> None:
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        self._inflight.clear()
+        # Jobs that never started: release what they own (spooled uploads) and record them as failed
+        while not self._queue.empty():
+            job, _, _, on_drop = self._queue.get_nowait()
+            if on_drop is not None:
+                try:
+                    on_drop()
+                except Exception:
+                    traceback.print_exc()
+            job.status = STATUS_FAILED
+            job.error = "The server shut down before processing started. Please try again."
+            self.store.save(job)
+
+    def submit(
+        self,
+        kind: str,
+        document_id: str,
+        run: JobRunner,
+        key: Optional[str] = None,
+        on_drop: Optional[Callable[[], None]] = None,
+    ) -> Job:
+        """
+        Queue an ingestion run. Raises JobQueueFull when the queue is at capacity.
+        If a job with the same key is still queued or running, that job is returned instead
+        (run is not scheduled), so concurrent requests for the same source share one ingestion.
+        on_drop is called instead of run if the queue stops before the job starts.
+        """
+        self.start()
+        now = time.time()
+        if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = now
+            self.store.prune(now - self._retention_seconds)
+        if key is not None:
+            existing = self._inflight.get(key)
+            if existing is not None:
+                logger.info("Job coalesced", job_id=existing.id, kind=kind, key=key)
+                return existing
+        job = Job(id=str(uuid.uuid4()), kind=kind, document_id=document_id)
+        try:
+            self._queue.put_nowait((job, run, key, on_drop))
+        except asyncio.QueueFull:
+            raise JobQueueFull("Server is busy processing other content. Please try again shortly.") from None
+        if key is not None:
+            self._inflight[key] = job
+        self.store.save(job)
+        logger.info("Job queued", job_id=job.id, kind=kind, document_id=document_id)
+        return job
+
+    def complete(self, kind: str, document_id: str, result: dict) -> Job:
+        """Record a job that finished without running (e.g. duplicate content served from the index)."""
+        job = Job(
+            id=str(uuid.uuid4()),
+            kind=kind,
+            document_id=document_id,
+            status=STATUS_SUCCEEDED,
+            stage=STAGE_STORED,
+            result=result,
+        )
+        self.store.save(job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job, run, key, _ = await self._queue.get()
+            try:
+                await self._run_job(job, run)
+            finally:
+                if key is not None and self._inflight.get(key) is job:
+                    del self._inflight[key]
+                self._queue.task_done()
+
+    async def _save(self, job: Job) -> None:
+        """Save a snapshot of job in the executor (SQLite commits must not block the event loop)."""
+        snapshot = replace(job, progress=dict(job.progress))
+        await asyncio.get_event_loop().run_in_executor(None, self.store.save, snapshot)
+        job.updated_at = snapshot.updated_at
+
+    async def _run_job(self, job: Job, run: JobRunner) -> None:
+        job.status = STATUS_RUNNING
+        await self._save(job)
+        dirty = False
+        done = asyncio.Event()
+
+        def progress(stage: str, **counters: int) -> None:
+            nonlocal dirty
+            job.stage = stage
+            job.progress.update(counters)
+            dirty = True
+
+        async def flush_progress() -> None:
+            # Progress is saved at most once per interval, however often the run reports it
+            nonlocal dirty
+            while not done.is_set():
+                try:
+                    await asyncio.wait_for(done.wait(), timeout=PROGRESS_SAVE_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                if dirty and not done.is_set():
+                    dirty = False
+                    await self._save(job)
+
+        flusher = asyncio.ensure_future(flush_progress())
+        try:
+            job.result = await run(progress)
+            # A run can resolve to an already indexed document (duplicate content); report that one
+            if isinstance(job.result, dict) and job.result.get("document_id"):
+                job.document_id = job.result["document_id"]
+            job.status = STATUS_SUCCEEDED
+            job.stage = STAGE_STORED
+            logger.info("Job finished", job_id=job.id, document_id=job.document_id)
+        except ValueError as e:
+            job.status = STATUS_FAILED
+            job.error = str(e)
+            logger.warning("Job failed", job_id=job.id, error=str(e))
+        except Exception as e:
+            traceback.print_exc()
+            job.status = STATUS_FAILED
+            job.error = str(e)
+            logger.exception("Job crashed", job_id=job.id)
+        finally:
+            done.set()
+            await flusher
+            await self._save(job)
+
+
+_job_queue: Optional[JobQueue] = None
+
+
+def _create_store():
+    settings = get_settings()
+    if (settings.job_store or "memory").strip().lower() == "sqlite":
+        return SQLiteJobStore(settings.job_store_path)
+    return InMemoryJobStore()
+
+
+def get_job_queue() -> JobQueue:
+    """Process-wide job queue (created in the app lifespan, or lazily on first use)."""
+    global _job_queue
+    if _job_queue is None:
+        settings = get_settings()
+        _job_queue = JobQueue(
+            _create_store(),
+            workers=settings.ingestion_workers,
+            max_queued=settings.ingestion_queue_size,
+            retention_seconds=settings.job_retention_seconds,
+        )
+    return _job_queue
+
+
+async def start_job_queue() -> None:
+    get_job_queue().start()
+
+
+async def stop_job_queue() -> None:
+    global _job_queue
+    if _job_queue is not None:
+        await _job_queue.stop()
+        close = getattr(_job_queue.store, "close", None)
+        if close:
+            close()
+        _job_queue = None
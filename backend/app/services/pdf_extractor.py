@@ -1,32 +1,48 @@
-"""PDF text extraction service (pypdf-only)."""
+"""PDF text extraction service (pypdf-only).
 
-from io import BytesIO
-from typing import Tuple
+Extraction is CPU-bound pure Python, so the async entry point runs it in a process pool and
+splits large documents into page ranges that are extracted in parallel. Workers parse the
+spooled upload through a read-only memory map, so the bytes are never copied per request.
+"""
 
+import asyncio
+import mmap
+import multiprocessing
+import threading
+import time
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from io import BytesIO
+from typing import Iterator, List, Optional, Tuple, Union
+
 from pypdf import PdfReader
 
+from app.config import get_settings
 from app.utils.chunking import clean_text
 from app.utils.logging_config import get_logger
 
 logger = get_logger("pdf")
 
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
 
-def extract_text_from_pdf(file_content: bytes, filename: str = "document.pdf") -> Tuple[str, str]:
-    """
-    Extract text from PDF bytes using pypdf only.
-    Returns (title, extracted_text).
-    """
+
+def _open_reader(stream: Union[BytesIO, mmap.mmap]) -> PdfReader:
     try:
-        reader = PdfReader(BytesIO(file_content))
+        reader = PdfReader(stream)
     except Exception as e:
         traceback.print_exc()
         raise ValueError(f"Could not open PDF: {e}")
 
     if not reader.pages:
         raise ValueError("PDF appears to be empty")
+    return reader
 
-    # Derive a human-readable title
+
+def _derive_title(reader: PdfReader, filename: str) -> str:
+    """Derive a human-readable title from metadata, falling back to the filename."""
     title = filename.rsplit(".", 1)[0] if "." in filename else filename
     try:
         if reader.metadata and getattr(reader.metadata, "title", None):
@@ -36,17 +52,26 @@ def extract_text_from_pdf(file_content: bytes, filename: str = "document.pdf") -
     except Exception:
         # Metadata is optional; don't fail extraction because of it
         traceback.print_exc()
+    return title
+
 
+def _extract_page_texts(reader: PdfReader, start: int, end: int, deadline: Optional[float] = None) -> Tuple[List[str], bool]:
+    """Extract text of pages [start, end). Stops early (returns timed_out=True) once deadline passes."""
     text_parts = []
-    for page in reader.pages:
+    for index in range(start, end):
+        if deadline is not None and time.time() > deadline:
+            return text_parts, True
         try:
-            page_text = page.extract_text() or ""
+            page_text = reader.pages[index].extract_text() or ""
         except Exception:
             traceback.print_exc()
             page_text = ""
         if page_text:
             text_parts.append(page_text)
+    return text_parts, False
+
 
+def _finish_text(text_parts: List[str]) -> str:
     full_text = "\n".join(text_parts)
     full_text = clean_text(full_text)
 
@@ -55,5 +80,111 @@ def extract_text_from_pdf(file_content: bytes, filename: str = "document.pdf") -
             "Could not extract meaningful text from PDF. "
             "The file may be scanned (image-based) or encrypted."
         )
+    return full_text
+
+
+def extract_text_from_pdf(file_content: bytes, filename: str = "document.pdf") -> Tuple[str, str]:
+    """
+    Extract text from PDF bytes using pypdf only.
+    Returns (title, extracted_text).
+    """
+    reader = _open_reader(BytesIO(file_content))
+    title = _derive_title(reader, filename)
+    text_parts, _ = _extract_page_texts(reader, 0, len(reader.pages))
+    return title, _finish_text(text_parts)
+
+
+# ---------- Process pool workers (top-level so they can be pickled) ----------
+
+@contextmanager
+def _mapped_reader(path: str) -> Iterator[PdfReader]:
+    """PdfReader over a read-only mmap of the file; pages are read straight from the page cache."""
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        yield _open_reader(mapped)
+    finally:
+        mapped.close()
+
+
+def _worker_read_info(path: str, filename: str) -> Tuple[str, int]:
+    with _mapped_reader(path) as reader:
+        return _derive_title(reader, filename), len(reader.pages)
+
+
+def _worker_extract_range(path: str, start: int, end: int, deadline: float) -> Tuple[List[str], bool]:
+    with _mapped_reader(path) as reader:
+        return _extract_page_texts(reader, start, end, deadline)
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            workers = get_settings().pdf_process_workers or multiprocessing.cpu_count()
+            # spawn: forking a process that runs an event loop and thread pools is not safe
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            logger.info("PDF process pool started", workers=workers)
+        return _pdf_pool
+
+
+def _reset_pdf_pool(pool: Optional[ProcessPoolExecutor] = None) -> None:
+    """Drop the current pool (only if it is still pool, when given)."""
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is not None and (pool is None or _pdf_pool is pool):
+            _pdf_pool.shutdown(wait=False, cancel_futures=True)
+            _pdf_pool = None
+
+
+def shutdown_pdf_pool() -> None:
+    """Stop the PDF process pool (called on app shutdown)."""
+    _reset_pdf_pool()
+
+
+async def _extract_in_pool(
+    pool: ProcessPoolExecutor, path: str, filename: str, deadline: float
+) -> Tuple[str, List[Tuple[List[str], bool]]]:
+    loop = asyncio.get_event_loop()
+    title, page_count = await loop.run_in_executor(pool, _worker_read_info, path, filename)
+    pages_per_task = max(1, get_settings().pdf_pages_per_task)
+    futures = [
+        loop.run_in_executor(
+            pool, _worker_extract_range, path, start, min(start + pages_per_task, page_count), deadline
+        )
+        for start in range(0, page_count, pages_per_task)
+    ]
+    return title, await asyncio.gather(*futures)
+
+
+async def extract_text_from_pdf_async(path: str, filename: str = "document.pdf") -> Tuple[str, str]:
+    """
+    Extract text from the PDF at path in the process pool, splitting large files into page ranges across workers.
+    The whole document must finish within pdf_extraction_timeout_seconds.
+    Returns (title, extracted_text).
+    """
+    settings = get_settings()
+    budget = settings.pdf_extraction_timeout_seconds
+    deadline = time.time() + budget
+    pool = _get_pdf_pool()
 
-    return title, full_text
+    try:
+        # Workers stop cooperatively at the deadline (checked between pages). The outer timeout only
+        # stops waiting: cancelling the gather cancels this document's page ranges that have not
+        # started, while other documents' work on the shared pool is left alone
+        title, results = await asyncio.wait_for(_extract_in_pool(pool, path, filename, deadline), timeout=budget + 5)
+    except asyncio.TimeoutError:
+        logger.warning("PDF extraction hit the hard timeout; a worker may still be finishing a page", filename=filename)
+        results = [([], True)]
+    except BrokenProcessPool:
+        traceback.print_exc()
+        _reset_pdf_pool(pool)
+        raise ValueError("PDF processing failed unexpectedly. Please try again.") from None
+
+    if any(timed_out for _, timed_out in results):
+        logger.warning("PDF extraction exceeded time budget", filename=filename, budget=budget)
+        raise ValueError(
+            f"PDF took too long to process (limit {int(budget)}s). Try a smaller file or fewer pages."
+        )
+    text_parts = [part for parts, _ in results for part in parts]
+    return title, _finish_text(text_parts)
@@ -1,19 +1,74 @@
 """RAG (Retrieval-Augmented Generation) service using Supabase pgvector."""
 
+import asyncio
+import hashlib
+import threading
+import time
 import traceback
-from typing import List, Optional
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple, TypeVar
 
+import httpx
+import numpy as np
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
 
 from app.config import get_settings
-from app.services.embeddings import generate_embeddings
+from app.services.embeddings import embed_query, generate_embeddings, normalize_query, to_bit_string, to_wire
+from app.services.jobs import STAGE_CHUNKED, STAGE_EMBEDDED, STAGE_EMBEDDING, ProgressCallback
+from app.services.vector_store import LocalVectorStore, VectorStore
+from app.utils.bm25 import BM25Index, tokenize
+from app.utils.cache import LRUCache
 from app.utils.chunking import chunk_text
 from app.utils.logging_config import get_logger
 
 logger = get_logger("rag")
 
+T = TypeVar("T")
 
-def get_supabase_client() -> Client:
+# Postgres unique_violation
+_UNIQUE_VIOLATION = "23505"
+# PostgREST: no function matches the RPC name/arguments
+_FUNCTION_NOT_FOUND = "PGRST202"
+
+# A claimed document that has not finished indexing after this long is assumed abandoned (crash/restart)
+_STALE_CLAIM_SECONDS = 30 * 60
+
+
+# Query embeddings are quantized to int8 before fingerprinting, so near-identical vectors share an entry
+_FINGERPRINT_SCALE = 127
+
+_retrieval_cache: Optional[LRUCache] = None
+# Retrieval RPCs found missing (PGRST202) on this database; not retried until restart
+_missing_rpcs: Set[str] = set()
+_retrieval_cache_lock = threading.Lock()
+# document_id -> (chunk rows, BM25Index): full-text stand-in while migration 004 is not applied
+_bm25_indexes = LRUCache(32)
+# One download/build at a time, so concurrent first queries on a document share the result
+_bm25_build_lock = threading.Lock()
+# Bumped on every invalidation; a build that started before one is used once but not cached
+_bm25_epoch = 0
+# PostgREST returns at most this many rows per request
+_PAGE_SIZE = 1000
+# Request words that carry no searchable content; queries made only of these and stopwords need the embedding
+_INSTRUCTION_TERMS = frozenset(
+    {"summarize", "summarise", "summary", "explain", "describe", "elaborate", "overview", "tell", "give"}
+)
+
+
+class DocumentExistsError(Exception):
+    """Raised when a document with the same (source_type, content_hash) is already stored or being indexed."""
+
+    def __init__(self, document: dict):
+        super().__init__(f"Document already exists: {document.get('id')}")
+        self.document = document
+
+
+_supabase_client: Optional[Client] = None
+_supabase_lock = threading.Lock()
+
+
+def _create_supabase_client() -> Client:
     """Create Supabase client. No proxy or custom httpx passed."""
     settings = get_settings()
     if not settings.supabase_url or not settings.supabase_service_key:
@@ -29,6 +84,123 @@ def get_supabase_client() -> Client:
         raise
 
 
+def get_supabase_client() -> Client:
+    """Return the process-wide Supabase client, creating it on first use."""
+    global _supabase_client
+    client = _supabase_client
+    if client is not None:
+        return client
+    with _supabase_lock:
+        if _supabase_client is None:
+            _supabase_client = _create_supabase_client()
+        return _supabase_client
+
+
+def reset_supabase_client() -> None:
+    """Drop the cached client so the next call reconnects."""
+    global _supabase_client
+    with _supabase_lock:
+        _supabase_client = None
+
+
+def check_supabase_health() -> bool:
+    """Cheap round trip on the shared client; reconnects once if the connection is broken."""
+    for attempt in range(2):
+        try:
+            get_supabase_client().table("documents").select("id").limit(1).execute()
+            return True
+        except httpx.TransportError as e:
+            logger.warning("Supabase health check failed", attempt=attempt + 1, error=str(e))
+            reset_supabase_client()
+        except Exception as e:
+            logger.warning("Supabase health check failed", error=str(e))
+            return False
+    return False
+
+
+def init_supabase_client() -> None:
+    """Warm the shared client at startup. Missing config is not fatal (routes report it)."""
+    settings = get_settings()
+    if not settings.supabase_url or not settings.supabase_service_key:
+        logger.info("Supabase not configured; skipping client warmup")
+        return
+    if check_supabase_health():
+        logger.info("Supabase client ready")
+
+
+def run_supabase(op: Callable[[Client], T]) -> T:
+    """Run an idempotent operation on the shared client, reconnecting once on transport errors."""
+    try:
+        return op(get_supabase_client())
+    except httpx.TransportError as e:
+        logger.warning("Supabase connection error; reconnecting", error=str(e))
+        reset_supabase_client()
+        return op(get_supabase_client())
+
+
+def get_retrieval_cache() -> Optional[LRUCache]:
+    """Process-wide (document_id, mode, query key, top_k) -> ranked chunks cache, or None when disabled."""
+    global _retrieval_cache
+    settings = get_settings()
+    if settings.retrieval_cache_items <= 0:
+        return None
+    if _retrieval_cache is None:
+        with _retrieval_cache_lock:
+            if _retrieval_cache is None:
+                _retrieval_cache = LRUCache(
+                    settings.retrieval_cache_items,
+                    ttl_seconds=settings.retrieval_cache_ttl_seconds or None,
+                )
+    return _retrieval_cache
+
+
+def invalidate_retrieval_cache(document_id: str) -> None:
+    """Drop cached retrieval results for a document (called whenever it is (re)indexed or deleted)."""
+    cache = get_retrieval_cache()
+    if cache is not None:
+        cache.pop_matching(lambda key: key[0] == document_id)
+    global _bm25_epoch
+    _bm25_epoch += 1
+    _bm25_indexes.pop(document_id)
+
+
+def _query_fingerprint(embedding: np.ndarray) -> str:
+    quantized = np.clip(np.rint(embedding * _FINGERPRINT_SCALE), -127, 127).astype(np.int8)
+    return hashlib.blake2b(quantized.tobytes(), digest_size=16).hexdigest()
+
+
+def _claim_is_stale(document: dict) -> bool:
+    try:
+        created = datetime.fromisoformat(document["created_at"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return False
+    return time.time() - created > _STALE_CLAIM_SECONDS
+
+
+def _get_document_by_hash(source_type: str, content_hash: str) -> Optional[dict]:
+    result = run_supabase(
+        lambda client: client.table("documents")
+        .select("id, title, content, chunk_count, created_at")
+        .eq("source_type", source_type)
+        .eq("content_hash", content_hash)
+        .limit(1)
+        .execute()
+    )
+    return result.data[0] if result.data else None
+
+
+async def find_indexed_document(source_type: str, content_hash: str) -> Optional[dict]:
+    """
+    Return the fully indexed document with this content hash (id, title, content, chunk_count), or None.
+    Documents still being indexed have no chunk_count yet and are not returned.
+    """
+    loop = asyncio.get_event_loop()
+    document = await loop.run_in_executor(None, _get_document_by_hash, source_type, content_hash)
+    if document is None or document.get("chunk_count") is None:
+        return None
+    return document
+
+
 async def upsert_document(
     document_id: str,
     source_type: str,
@@ -36,11 +208,15 @@ async def upsert_document(
     title: str,
     content: str,
     metadata: Optional[dict] = None,
+    progress: Optional[ProgressCallback] = None,
+    content_hash: Optional[str] = None,
 ) -> int:
     """
-    Store document and its chunks with embeddings in Supabase.
-    Returns number of chunks stored.
+    Store the document in Supabase and its chunks with embeddings in the configured vector store.
+    Returns number of chunks stored. progress(stage, **counters) reports ingestion stages.
+    With a content_hash, raises DocumentExistsError (before embedding) if the same content is already stored.
     """
+    report = progress or (lambda stage, **counters: None)
     settings = get_settings()
     client = get_supabase_client()
 
@@ -51,95 +227,449 @@ async def upsert_document(
     )
     if not chunks:
         raise ValueError("No chunks generated from content")
+    report(STAGE_CHUNKED, chunks=len(chunks))
 
-    embeddings = await generate_embeddings(chunks)
-
-    # Insert document (each processing creates a new document)
-    client.table("documents").insert(
-        {
-            "id": document_id,
-            "source_type": source_type,
-            "source_id": source_id,
-            "title": title,
-            "content": content,
-            "metadata": metadata or {},
-        }
-    ).execute()
-
-    # Delete existing chunks for this document
-    client.table("document_chunks").delete().eq("document_id", document_id).execute()
-
-    # Insert chunks with embeddings
-    rows = [
-        {
-            "document_id": document_id,
-            "chunk_index": i,
-            "content": chunk,
-            "embedding": emb,
-            "metadata": {},
-        }
-        for i, (chunk, emb) in enumerate(zip(chunks, embeddings))
-    ]
+    try:
+        await _claim_document(
+            client,
+            {
+                "id": document_id,
+                "source_type": source_type,
+                "source_id": source_id,
+                "content_hash": content_hash,
+                "title": title,
+                "content": content,
+                "metadata": metadata or {},
+            },
+        )
+    except httpx.TransportError:
+        reset_supabase_client()
+        raise
 
-    for row in rows:
-        client.table("document_chunks").insert(row).execute()
+    try:
+        embeddings = await generate_embeddings(
+            chunks,
+            progress=lambda done, total: report(STAGE_EMBEDDING, embedded=done, total=total),
+        )
+        report(STAGE_EMBEDDED, embedded=len(chunks), total=len(chunks))
+        await get_vector_store().add(document_id, chunks, embeddings)
+        await _mark_indexed(client, document_id, len(chunks))
+    except BaseException as e:
+        # All-or-nothing: drop the claimed document (and any chunks, via cascade)
+        logger.warning("Indexing failed; rolling back document", document_id=document_id, error=str(e))
+        await _delete_document(client, document_id)
+        if isinstance(e, httpx.TransportError):
+            # Writes are not retried (not idempotent); just make the next request reconnect
+            reset_supabase_client()
+        raise
 
+    invalidate_retrieval_cache(document_id)
     logger.info("Document indexed", document_id=document_id, chunks=len(chunks))
     return len(chunks)
 
 
-async def retrieve_context(
-    document_id: str,
-    query: str,
-    top_k: Optional[int] = None,
-) -> str:
+async def _claim_document(client: Client, row: dict) -> None:
+    """
+    Insert the document row with no chunk_count (i.e. still indexing).
+    The unique (source_type, content_hash) index makes this the dedup point for identical content.
+    """
+    loop = asyncio.get_event_loop()
+
+    def _insert():
+        return client.table("documents").insert(row).execute()
+
+    try:
+        await loop.run_in_executor(None, _insert)
+        return
+    except APIError as e:
+        if e.code != _UNIQUE_VIOLATION or not row.get("content_hash"):
+            raise
+
+    existing = await loop.run_in_executor(None, _get_document_by_hash, row["source_type"], row["content_hash"])
+    if existing is not None and (existing.get("chunk_count") is not None or not _claim_is_stale(existing)):
+        raise DocumentExistsError(existing)
+    if existing is not None:
+        logger.warning("Replacing abandoned partially indexed document", document_id=existing["id"])
+        await _delete_document(client, existing["id"])
+    # A second conflict means another ingestion claimed it just now; let the APIError propagate
+    await loop.run_in_executor(None, _insert)
+
+
+async def _delete_document(client: Client, document_id: str) -> None:
+    invalidate_retrieval_cache(document_id)
+    loop = asyncio.get_event_loop()
+    try:
+        await loop.run_in_executor(
+            None,
+            lambda: client.table("documents").delete().eq("id", document_id).execute(),
+        )
+    except Exception:
+        traceback.print_exc()
+        logger.exception("Rollback of partially indexed document failed", document_id=document_id)
+    try:
+        await get_vector_store().delete(document_id)
+    except Exception:
+        traceback.print_exc()
+        logger.exception("Removing document vectors failed", document_id=document_id)
+
+
+def _vector_storage() -> str:
+    storage = (get_settings().vector_storage or "vector").strip().lower()
+    return storage if storage in ("halfvec", "binary") else "vector"
+
+
+def _embedding_columns(embedding: np.ndarray, storage: str) -> dict:
+    """Chunk row columns for one embedding under the configured vector_storage mode."""
+    if storage == "halfvec":
+        # Only the float16 column is stored; PostgREST casts the JSON array to halfvec
+        return {"embedding_half": to_wire(embedding)}
+    if storage == "binary":
+        return {"embedding": to_wire(embedding), "embedding_bit": to_bit_string(embedding)}
+    return {"embedding": to_wire(embedding)}
+
+
+async def _mark_indexed(client: Client, document_id: str, chunk_count: int) -> None:
+    """Record chunk_count on the document, which marks it as fully indexed."""
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(
+        None,
+        lambda: client.table("documents").update({"chunk_count": chunk_count}).eq("id", document_id).execute(),
+    )
+
+
+def _match_chunks(document_id: str, query_embedding: List[float], top_k: int):
     """
-    Retrieve relevant chunks for a query using vector similarity.
-    Returns concatenated context string.
+    Similarity search RPC, newest first: match_document_chunks_{binary,halfvec} for quantized
+    vector_storage, then match_document_chunks_adaptive (exact scan for small documents, iterative
+    HNSW scan for large ones), then match_document_chunks_hnsw, then match_document_chunks.
+    Functions missing from a not-yet-migrated database are skipped from then on.
     """
     settings = get_settings()
-    client = get_supabase_client()
-    top_k = top_k or settings.max_retrieval_chunks
+    params = {
+        "query_embedding": query_embedding,
+        "match_document_id": document_id,
+        "match_count": top_k,
+    }
+    candidates = []
+    storage = _vector_storage()
+    if storage != "vector":
+        quantized = {
+            **params,
+            "ef_search": max(settings.hnsw_ef_search, 1),
+            "exact_scan_max_chunks": settings.retrieval_exact_scan_max_chunks,
+        }
+        if storage == "binary":
+            # Hamming candidates re-ranked by exact cosine on the float32 vectors
+            quantized["rerank_candidates"] = top_k * max(1, settings.vector_rerank_factor)
+        candidates.append((f"match_document_chunks_{storage}", quantized))
+    if settings.hnsw_ef_search > 0:
+        tuned = {**params, "ef_search": settings.hnsw_ef_search}
+        candidates.append(
+            ("match_document_chunks_adaptive", {**tuned, "exact_scan_max_chunks": settings.retrieval_exact_scan_max_chunks})
+        )
+        candidates.append(("match_document_chunks_hnsw", tuned))
+    for name, args in candidates:
+        if name in _missing_rpcs:
+            continue
+        try:
+            return run_supabase(lambda client: client.rpc(name, args).execute())
+        except APIError as e:
+            if e.code != _FUNCTION_NOT_FOUND:
+                raise
+            _missing_rpcs.add(name)
+            logger.warning("Retrieval function missing; apply database/migrations", function=name)
+    return run_supabase(lambda client: client.rpc("match_document_chunks", params).execute())
+
+
+def _is_keyword_query(query: str) -> bool:
+    """
+    Short queries (names, terms, acronyms, quoted phrases) that full-text search answers well.
+    Requests with no searchable term ("summarize this", "explain it to me") are not.
+    """
+    words = query.split()
+    if len(words) > get_settings().keyword_query_max_terms and not query.strip().startswith('"'):
+        return False
+    return any(term not in _INSTRUCTION_TERMS for term in tokenize(query))
+
+
+def _bm25_entry(document_id: str) -> Tuple[List[dict], BM25Index]:
+    """A document's chunk rows and their BM25 index, downloaded and built on first use (blocking)."""
+    entry = _bm25_indexes.get(document_id)
+    if entry is not None:
+        return entry
+    with _bm25_build_lock:
+        entry = _bm25_indexes.get(document_id)
+        if entry is not None:
+            return entry
+        epoch = _bm25_epoch
+        rows: List[dict] = []
+        while True:
+            page = run_supabase(
+                lambda client: client.table("document_chunks")
+                .select("chunk_index, content")
+                .eq("document_id", document_id)
+                .order("chunk_index")
+                .range(len(rows), len(rows) + _PAGE_SIZE - 1)
+                .execute()
+            ).data or []
+            rows.extend(page)
+            if len(page) < _PAGE_SIZE:
+                break
+        entry = (rows, BM25Index([r["content"] for r in rows]))
+        if epoch == _bm25_epoch:
+            _bm25_indexes.set(document_id, entry)
+        return entry
+
+
+def _bm25_search(document_id: str, query: str, limit: int, require_all: bool = False) -> List[dict]:
+    """
+    In-process BM25 over a document's chunks; the index is kept per document until it is invalidated.
+    Blocking: reached through SupabaseVectorStore.lexical_search, which retrieve_context runs in the executor.
+    """
+    rows, index = _bm25_entry(document_id)
+    return [rows[i] for i, _ in index.search(query, limit, require_all=require_all)]
+
+
+def _lexical_search(document_id: str, query: str, limit: int, require_all: bool = False) -> List[dict]:
+    """
+    Full-text ranked chunks via match_document_chunks_lexical, or the BM25 stand-in when it is missing.
+    The RPC always requires every query term (websearch_to_tsquery); the stand-in only with require_all.
+    """
+    name = "match_document_chunks_lexical"
+    if name not in _missing_rpcs:
+        try:
+            params = {"query_text": query, "match_document_id": document_id, "match_count": limit}
+            return run_supabase(lambda client: client.rpc(name, params).execute()).data or []
+        except APIError as e:
+            if e.code != _FUNCTION_NOT_FOUND:
+                raise
+            _missing_rpcs.add(name)
+            logger.warning("Retrieval function missing; apply database/migrations", function=name)
+    return _bm25_search(document_id, query, limit, require_all=require_all)
+
+
+def _hybrid_search(
+    document_id: str, query_embedding: List[float], query: str, limit: int
+) -> Optional[Tuple[List[dict], List[dict]]]:
+    """
+    (vector ranking, full-text ranking) from one match_document_chunks_hybrid call, or None when the
+    function is missing or unusable (quantized vector_storage searches other columns).
+    """
+    name = "match_document_chunks_hybrid"
+    if name in _missing_rpcs or _vector_storage() != "vector":
+        return None
+    settings = get_settings()
+    params = {
+        "query_embedding": query_embedding,
+        "query_text": query,
+        "match_document_id": document_id,
+        "match_count": limit,
+        "ef_search": max(settings.hnsw_ef_search, 1),
+        "exact_scan_max_chunks": settings.retrieval_exact_scan_max_chunks,
+    }
+    try:
+        rows = run_supabase(lambda client: client.rpc(name, params).execute()).data or []
+    except APIError as e:
+        if e.code != _FUNCTION_NOT_FOUND:
+            raise
+        _missing_rpcs.add(name)
+        logger.warning("Retrieval function missing; apply database/migrations", function=name)
+        return None
+    vector = sorted((r for r in rows if r.get("vector_rank") is not None), key=lambda r: r["vector_rank"])
+    lexical = sorted((r for r in rows if r.get("lexical_rank") is not None), key=lambda r: r["lexical_rank"])
+    return vector, lexical
+
 
-    # Generate query embedding
-    query_embeddings = await generate_embeddings([query])
-    query_embedding = query_embeddings[0]
-
-    # Supabase pgvector RPC for similarity search
-    # Using match_document_chunks RPC - we need to create it, or use raw SQL
-    # Supabase Python client supports rpc() for stored procedures
-    result = client.rpc(
-        "match_document_chunks",
-        {
-            "query_embedding": query_embedding,
-            "match_document_id": document_id,
-            "match_count": top_k,
-        },
-    ).execute()
-
-    if not result.data:
+def _reciprocal_rank_fusion(rankings: List[List[dict]], k: int) -> List[dict]:
+    """Merge ranked chunk lists: score = sum of 1 / (k + rank) over the lists a chunk appears in."""
+    scores: Dict[int, float] = {}
+    rows: Dict[int, dict] = {}
+    for ranking in rankings:
+        for rank, row in enumerate(ranking, start=1):
+            key = row["chunk_index"]
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank)
+            rows.setdefault(key, row)
+    return [rows[key] for key in sorted(scores, key=scores.__getitem__, reverse=True)]
+
+
+class SupabaseVectorStore(VectorStore):
+    """Chunks in the document_chunks table, searched with the pgvector / full-text RPCs above."""
+
+    async def add(self, document_id: str, chunks: List[str], embeddings: np.ndarray) -> None:
+        """Insert chunk rows in concurrent batches. Raises the first batch error."""
+        settings = get_settings()
+        client = get_supabase_client()
+        loop = asyncio.get_event_loop()
+
+        storage = _vector_storage()
+        rows = [
+            {
+                "document_id": document_id,
+                "chunk_index": i,
+                "content": chunk,
+                **_embedding_columns(emb, storage),
+                "metadata": {},
+            }
+            for i, (chunk, emb) in enumerate(zip(chunks, embeddings))
+        ]
+        batch_size = max(1, settings.chunk_insert_batch_size)
+        batches = [rows[i : i + batch_size] for i in range(0, len(rows), batch_size)]
+        semaphore = asyncio.Semaphore(max(1, settings.chunk_insert_concurrency))
+
+        async def _insert_batch(batch: List[dict]) -> None:
+            async with semaphore:
+                await loop.run_in_executor(
+                    None,
+                    lambda: client.table("document_chunks").insert(batch).execute(),
+                )
+
+        # Wait for every batch (no stragglers landing after the caller's rollback)
+        results = await asyncio.gather(*(_insert_batch(b) for b in batches), return_exceptions=True)
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if errors:
+            logger.warning(
+                "Chunk insert failed",
+                document_id=document_id,
+                failed_batches=len(errors),
+                batches=len(batches),
+                error=str(errors[0]),
+            )
+            raise errors[0]
+
+    async def delete(self, document_id: str) -> None:
+        # Chunk rows cascade with the documents row
+        return None
+
+    def search(self, document_id: str, embedding: np.ndarray, limit: int) -> List[dict]:
+        return _match_chunks(document_id, to_wire(embedding), limit).data or []
+
+    def lexical_search(self, document_id: str, query: str, limit: int, require_all: bool = False) -> List[dict]:
+        return _lexical_search(document_id, query, limit, require_all=require_all)
+
+    def hybrid_search(
+        self, document_id: str, embedding: np.ndarray, query: str, limit: int
+    ) -> Optional[Tuple[List[dict], List[dict]]]:
+        return _hybrid_search(document_id, to_wire(embedding), query, limit)
+
+    def first_chunks(self, document_id: str, limit: int) -> List[str]:
         # Fallback: if RPC doesn't exist, we'll need to create it
         # For now, fetch chunks and do client-side similarity (not ideal)
         # Better: ensure the RPC exists in schema
-        chunks_result = (
-            client.table("document_chunks")
+        chunks_result = run_supabase(
+            lambda client: client.table("document_chunks")
             .select("content")
             .eq("document_id", document_id)
-            .limit(top_k * 2)  # Get more, we can't rank without RPC
+            .limit(limit * 2)  # Get more, we can't rank without RPC
             .execute()
         )
-        chunks = [r["content"] for r in (chunks_result.data or [])]
-        return "\n\n---\n\n".join(chunks[:top_k]) if chunks else ""
+        return [r["content"] for r in (chunks_result.data or [])][:limit]
+
+
+_vector_store: Optional[VectorStore] = None
+_vector_store_lock = threading.Lock()
+
+
+def get_vector_store() -> VectorStore:
+    """Process-wide chunk store selected by vector_store ("supabase" or "local")."""
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is None:
+            settings = get_settings()
+            if (settings.vector_store or "supabase").strip().lower() == "local":
+                _vector_store = LocalVectorStore(
+                    settings.vector_store_path,
+                    hnsw_min_chunks=settings.local_hnsw_min_chunks,
+                    ef_search=settings.hnsw_ef_search,
+                    max_open_documents=settings.local_vector_store_max_documents,
+                )
+            else:
+                _vector_store = SupabaseVectorStore()
+        return _vector_store
+
+
+def close_vector_store() -> None:
+    global _vector_store
+    with _vector_store_lock:
+        if _vector_store is not None:
+            _vector_store.close()
+        _vector_store = None
+
+
+async def retrieve_context(
+    document_id: str,
+    query: str,
+    top_k: Optional[int] = None,
+) -> str:
+    """
+    Retrieve relevant chunks for a query (vector similarity, fused with full-text ranking when
+    hybrid_retrieval is on). Returns concatenated context string.
+    """
+    settings = get_settings()
+    top_k = top_k or settings.max_retrieval_chunks
+    hybrid = settings.hybrid_retrieval
+    depth = top_k * max(1, settings.hybrid_candidate_factor) if hybrid else top_k
+    cache = get_retrieval_cache()
+    store = get_vector_store()
+    # Store searches are blocking (PostgREST round trips, NumPy/BM25 scoring), so they run in the executor
+    loop = asyncio.get_event_loop()
+
+    # Keyword-style queries: full-text alone is enough when top_k chunks contain every query term,
+    # skipping the embedding
+    lexical = None
+    if hybrid and _is_keyword_query(query):
+        cache_key = (document_id, "lexical", normalize_query(query), top_k)
+        cached = cache.get(cache_key) if cache is not None else None
+        if cached is not None:
+            return "\n\n---\n\n".join(cached)
+        lexical = await loop.run_in_executor(
+            None, lambda: store.lexical_search(document_id, query, depth, require_all=True)
+        )
+        if len(lexical) >= top_k:
+            chunks = [r["content"] for r in lexical[:top_k]]
+            if cache is not None:
+                cache.set(cache_key, chunks)
+            return "\n\n---\n\n".join(chunks)
 
-    chunks = [r["content"] for r in result.data]
+    # Query embedding (repeated questions are served from the query cache)
+    embedding = await embed_query(query)
+    if hybrid:
+        cache_key = (document_id, "hybrid", f"{_query_fingerprint(embedding)}:{normalize_query(query)}", top_k)
+    else:
+        cache_key = (document_id, "vector", _query_fingerprint(embedding), top_k)
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return "\n\n---\n\n".join(cached)
+
+    if not hybrid:
+        ranked = await loop.run_in_executor(None, store.search, document_id, embedding, top_k)
+    else:
+        # One round trip when the hybrid function is available and full-text has not run yet
+        rankings = None
+        if lexical is None:
+            rankings = await loop.run_in_executor(None, store.hybrid_search, document_id, embedding, query, depth)
+        if rankings is None:
+            vector = await loop.run_in_executor(None, store.search, document_id, embedding, depth)
+            if lexical is None:
+                lexical = await loop.run_in_executor(None, store.lexical_search, document_id, query, depth)
+            rankings = (vector, lexical)
+        ranked = _reciprocal_rank_fusion(list(rankings), settings.rrf_k)[:top_k]
+
+    if not ranked:
+        chunks = await loop.run_in_executor(None, store.first_chunks, document_id, top_k)
+        return "\n\n---\n\n".join(chunks) if chunks else ""
+
+    chunks = [r["content"] for r in ranked]
+    # Only ranked RPC results are cached; the unranked fallback is not worth keeping
+    if cache is not None and chunks:
+        cache.set(cache_key, chunks)
     return "\n\n---\n\n".join(chunks) if chunks else ""
 
 
 async def get_document_content(document_id: str) -> Optional[str]:
     """Fetch full document content by ID."""
-    client = get_supabase_client()
-    result = (
-        client.table("documents")
+    result = run_supabase(
+        lambda client: client.table("documents")
         .select("content")
         .eq("id", document_id)
         .single()
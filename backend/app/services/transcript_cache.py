@@ -0,0 +1,98 @@
+"""Transcript cache keyed by (video_id, language), a TieredCache with per-entry expiry.
+
+Successful transcripts live for transcript_cache_ttl_seconds. Permanent-looking failures
+(captions disabled, video unavailable, no transcript) are cached for a much shorter TTL so
+repeatedly submitted bad URLs don't keep hitting YouTube and yt-dlp.
+"""
+
+import sqlite3
+import threading
+from typing import NamedTuple, Optional, Tuple
+
+from app.config import get_settings
+from app.utils.cache import TieredCache
+from app.utils.logging_config import get_logger
+
+logger = get_logger("transcript_cache")
+
+TranscriptKey = Tuple[str, str]
+
+
+class CachedTranscript(NamedTuple):
+    """A cached fetch outcome: (title, text) on success, or the user-facing error message."""
+
+    title: Optional[str]
+    text: Optional[str]
+    error: Optional[str]
+
+
+class TranscriptCache(TieredCache):
+    """Two-tier transcript cache with separate TTLs for transcripts and for failures."""
+
+    table = "transcripts"
+    create_sql = """CREATE TABLE IF NOT EXISTS transcripts (
+        video_id TEXT NOT NULL,
+        language TEXT NOT NULL,
+        title TEXT,
+        text TEXT,
+        error TEXT,
+        expires_at REAL NOT NULL,
+        PRIMARY KEY (video_id, language)
+    )"""
+    key_columns = ("video_id", "language")
+    value_columns = ("title", "text", "error")
+    expires = True
+
+    def __init__(self, path: str, memory_items: int, ttl_seconds: int, negative_ttl_seconds: int):
+        super().__init__(path, memory_items)
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+    def _to_row(self, value: CachedTranscript) -> tuple:
+        return tuple(value)
+
+    def _from_row(self, row: tuple) -> CachedTranscript:
+        return CachedTranscript(*row)
+
+    async def put(self, key: TranscriptKey, entry: CachedTranscript, ttl_seconds: Optional[float] = None) -> None:
+        """Store a fetch outcome; the TTL defaults to the success or the failure TTL."""
+        if ttl_seconds is None:
+            ttl_seconds = self.negative_ttl_seconds if entry.error else self.ttl_seconds
+        if ttl_seconds <= 0:
+            return
+        await super().put(key, entry, ttl_seconds=ttl_seconds)
+
+
+_cache: Optional[TranscriptCache] = None
+_cache_failed = False
+_cache_lock = threading.Lock()
+
+
+def get_transcript_cache() -> Optional[TranscriptCache]:
+    """Process-wide cache, or None when disabled or the store cannot be opened."""
+    global _cache, _cache_failed
+    settings = get_settings()
+    if not settings.transcript_cache_enabled or _cache_failed:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None and not _cache_failed:
+                try:
+                    _cache = TranscriptCache(
+                        settings.transcript_cache_path,
+                        settings.transcript_cache_memory_items,
+                        settings.transcript_cache_ttl_seconds,
+                        settings.transcript_cache_negative_ttl_seconds,
+                    )
+                except (sqlite3.Error, OSError) as e:
+                    _cache_failed = True
+                    logger.warning("Transcript cache unavailable; fetching without cache", error=str(e))
+    return _cache
+
+
+def close_transcript_cache() -> None:
+    global _cache
+    with _cache_lock:
+        if _cache is not None:
+            _cache.close()
+            _cache = None
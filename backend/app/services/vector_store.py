@@ -0,0 +1,237 @@
+"""Chunk vector stores: the VectorStore interface and the in-process LocalVectorStore.
+
+The default store is rag_service.SupabaseVectorStore (pgvector RPCs). LocalVectorStore keeps one
+directory per document under vector_store_path: the L2-normalized float32 embedding matrix
+(vectors.npy, memory-mapped on load), the chunk texts (chunks.json) and, for large documents when
+hnswlib is installed, an HNSW graph (index.hnsw). Search runs in the API process with no network
+round trip, so it only suits a single node (or tests and offline development).
+"""
+
+import asyncio
+import json
+import os
+import shutil
+import threading
+import uuid
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from app.utils.bm25 import BM25Index
+from app.utils.cache import LRUCache
+from app.utils.logging_config import get_logger
+
+logger = get_logger("vector_store")
+
+VECTORS_FILE = "vectors.npy"
+CHUNKS_FILE = "chunks.json"
+GRAPH_FILE = "index.hnsw"
+
+# hnswlib build parameters (same as the pgvector HNSW index)
+HNSW_M = 16
+HNSW_EF_CONSTRUCTION = 64
+
+
+class VectorStore(ABC):
+    """
+    Chunk vectors and similarity search for indexed documents. Result rows are dicts with at least
+    chunk_index and content, best first. Document rows themselves always live in Supabase.
+    The search methods block; callers on the event loop run them in an executor.
+    """
+
+    @abstractmethod
+    async def add(self, document_id: str, chunks: List[str], embeddings: np.ndarray) -> None:
+        """Store every chunk of a document with its embedding; raise if any part fails."""
+
+    @abstractmethod
+    async def delete(self, document_id: str) -> None:
+        """Remove a document's chunks (used for rollback and replacement)."""
+
+    @abstractmethod
+    def search(self, document_id: str, embedding: np.ndarray, limit: int) -> List[dict]:
+        """Chunks most similar to an L2-normalized query embedding."""
+
+    @abstractmethod
+    def lexical_search(self, document_id: str, query: str, limit: int, require_all: bool = False) -> List[dict]:
+        """
+        Chunks ranked by full-text relevance; chunks sharing no term are not returned, and with
+        require_all only chunks containing every (non-stopword) query term are.
+        """
+
+    def hybrid_search(
+        self, document_id: str, embedding: np.ndarray, query: str, limit: int
+    ) -> Optional[Tuple[List[dict], List[dict]]]:
+        """(vector ranking, full-text ranking) in one call, or None to run search and lexical_search separately."""
+        return None
+
+    def first_chunks(self, document_id: str, limit: int) -> List[str]:
+        """Unranked chunk contents, used when search returns nothing."""
+        return []
+
+    def close(self) -> None:
+        pass
+
+
+_hnswlib = None
+_hnswlib_checked = False
+
+
+def _get_hnswlib():
+    """The hnswlib module, or None when it is not installed (exact search is used instead)."""
+    global _hnswlib, _hnswlib_checked
+    if not _hnswlib_checked:
+        try:
+            import hnswlib
+
+            _hnswlib = hnswlib
+        except ImportError:
+            logger.warning("hnswlib not installed; local vector store uses exact search only")
+        _hnswlib_checked = True
+    return _hnswlib
+
+
+class _LocalDocument:
+    __slots__ = ("chunks", "vectors", "graph", "_bm25", "_lock")
+
+    def __init__(self, chunks: List[str], vectors: np.ndarray, graph=None):
+        self.chunks = chunks
+        self.vectors = vectors
+        self.graph = graph
+        self._bm25: Optional[BM25Index] = None
+        self._lock = threading.Lock()
+
+    def bm25(self) -> BM25Index:
+        with self._lock:
+            if self._bm25 is None:
+                self._bm25 = BM25Index(self.chunks)
+            return self._bm25
+
+    def rows(self, indices, similarities=None) -> List[dict]:
+        if similarities is None:
+            return [{"chunk_index": int(i), "content": self.chunks[i]} for i in indices]
+        return [
+            {"chunk_index": int(i), "content": self.chunks[i], "similarity": float(s)}
+            for i, s in zip(indices, similarities)
+        ]
+
+
+class LocalVectorStore(VectorStore):
+    """Per-document float32 matrices on local disk, searched exactly with NumPy or through an hnswlib graph."""
+
+    def __init__(self, path: str, hnsw_min_chunks: int = 0, ef_search: int = 40, max_open_documents: int = 256):
+        self.path = os.path.abspath(path)
+        self.hnsw_min_chunks = hnsw_min_chunks
+        self.ef_search = max(1, ef_search)
+        os.makedirs(self.path, exist_ok=True)
+        # Loaded documents; evicted ones release their memory maps once no search holds them
+        self._open = LRUCache(max_open_documents)
+        self._write_lock = threading.Lock()
+
+    def _directory(self, document_id: str) -> Optional[str]:
+        """Directory for a document id, or None if it is not a UUID (ids come from requests)."""
+        try:
+            return os.path.join(self.path, str(uuid.UUID(document_id)))
+        except (ValueError, AttributeError, TypeError):
+            return None
+
+    def _build_graph(self, vectors: np.ndarray):
+        hnswlib = _get_hnswlib()
+        if hnswlib is None:
+            return None
+        graph = hnswlib.Index(space="ip", dim=vectors.shape[1])
+        graph.init_index(max_elements=len(vectors), M=HNSW_M, ef_construction=HNSW_EF_CONSTRUCTION)
+        graph.add_items(vectors, np.arange(len(vectors)))
+        return graph
+
+    def _write(self, document_id: str, chunks: List[str], embeddings: np.ndarray) -> None:
+        directory = self._directory(document_id)
+        if directory is None:
+            raise ValueError(f"Invalid document id: {document_id!r}")
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if len(vectors) != len(chunks):
+            raise ValueError("Chunk and embedding counts differ")
+        # Written to a scratch directory and renamed into place, so readers never see a partial document
+        scratch = f"{directory}.{uuid.uuid4().hex}.tmp"
+        os.makedirs(scratch)
+        try:
+            np.save(os.path.join(scratch, VECTORS_FILE), vectors)
+            with open(os.path.join(scratch, CHUNKS_FILE), "w", encoding="utf-8") as f:
+                json.dump(chunks, f)
+            if self.hnsw_min_chunks > 0 and len(chunks) >= self.hnsw_min_chunks:
+                graph = self._build_graph(vectors)
+                if graph is not None:
+                    graph.save_index(os.path.join(scratch, GRAPH_FILE))
+            with self._write_lock:
+                self._open.pop(document_id)
+                shutil.rmtree(directory, ignore_errors=True)
+                os.replace(scratch, directory)
+        except BaseException:
+            shutil.rmtree(scratch, ignore_errors=True)
+            raise
+
+    def _load(self, document_id: str) -> Optional[_LocalDocument]:
+        document = self._open.get(document_id)
+        if document is not None:
+            return document
+        directory = self._directory(document_id)
+        if directory is None or not os.path.isdir(directory):
+            return None
+        try:
+            with open(os.path.join(directory, CHUNKS_FILE), "r", encoding="utf-8") as f:
+                chunks = json.load(f)
+            vectors = np.load(os.path.join(directory, VECTORS_FILE), mmap_mode="r")
+        except FileNotFoundError:
+            # Replaced or deleted while loading
+            return None
+        graph = None
+        graph_path = os.path.join(directory, GRAPH_FILE)
+        if os.path.exists(graph_path) and _get_hnswlib() is not None:
+            graph = _get_hnswlib().Index(space="ip", dim=vectors.shape[1])
+            graph.load_index(graph_path, max_elements=len(vectors))
+        document = _LocalDocument(chunks, vectors, graph)
+        self._open.set(document_id, document)
+        return document
+
+    async def add(self, document_id: str, chunks: List[str], embeddings: np.ndarray) -> None:
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._write, document_id, chunks, embeddings)
+
+    async def delete(self, document_id: str) -> None:
+        directory = self._directory(document_id)
+        if directory is None:
+            return
+
+        def _remove():
+            with self._write_lock:
+                self._open.pop(document_id)
+                shutil.rmtree(directory, ignore_errors=True)
+
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, _remove)
+
+    def search(self, document_id: str, embedding: np.ndarray, limit: int) -> List[dict]:
+        document = self._load(document_id)
+        if document is None or not document.chunks or limit <= 0:
+            return []
+        k = min(limit, len(document.chunks))
+        query = np.asarray(embedding, dtype=np.float32)
+        if document.graph is not None:
+            document.graph.set_ef(max(self.ef_search, k))
+            labels, distances = document.graph.knn_query(query, k=k)
+            # Inner-product space: distance = 1 - dot, i.e. 1 - cosine for normalized vectors
+            return document.rows(labels[0], 1.0 - distances[0])
+        # Vectors are L2-normalized, so the dot product is the cosine similarity
+        scores = document.vectors @ query
+        top = np.argpartition(-scores, k - 1)[:k] if k < len(scores) else np.arange(len(scores))
+        order = top[np.argsort(-scores[top], kind="stable")]
+        return document.rows(order, scores[order])
+
+    def lexical_search(self, document_id: str, query: str, limit: int, require_all: bool = False) -> List[dict]:
+        document = self._load(document_id)
+        if document is None or not document.chunks:
+            return []
+        return document.rows([i for i, _ in document.bm25().search(query, limit, require_all=require_all)])
+
+    def close(self) -> None:
+        self._open.clear()
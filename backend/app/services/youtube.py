@@ -1,10 +1,12 @@
 """YouTube transcript extraction service."""
 
-import os
+import asyncio
+import codecs
 import re
-import tempfile
+import threading
 import traceback
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator, Optional
 from urllib.parse import parse_qs, urlparse
 
 from youtube_transcript_api import YouTubeTranscriptApi
@@ -14,11 +16,60 @@ from youtube_transcript_api._errors import (
     VideoUnavailable,
 )
 
+from app.config import get_settings
+from app.services.transcript_cache import CachedTranscript, get_transcript_cache
 from app.utils.chunking import clean_text
 from app.utils.logging_config import get_logger
 
 logger = get_logger("youtube")
 
+# Transcripts are fetched in English (any regional variant); also the transcript cache language key
+TRANSCRIPT_LANGUAGE = "en"
+TRANSCRIPT_LANGUAGES = ["en", "en-US", "en-GB"]
+
+
+class TranscriptUnavailableError(ValueError):
+    """The video itself has no usable transcript (disabled, unavailable, none found). Safe to cache."""
+
+
+# yt-dlp could not run (error, timeout, too busy): says nothing about the video, so it is not cached
+_YTDLP_FAILED_MESSAGE = "Could not fetch captions for this video right now. Please try again later."
+
+
+# Transcript fetching is blocking network work (and possibly a whole yt-dlp run), so it gets its
+# own bounded pool instead of the event loop or the default executor.
+_transcript_executor: Optional[ThreadPoolExecutor] = None
+_ytdlp_semaphore: Optional[threading.BoundedSemaphore] = None
+_pool_lock = threading.Lock()
+
+
+def _get_transcript_executor() -> ThreadPoolExecutor:
+    global _transcript_executor
+    with _pool_lock:
+        if _transcript_executor is None:
+            _transcript_executor = ThreadPoolExecutor(
+                max_workers=max(1, get_settings().transcript_fetch_workers),
+                thread_name_prefix="transcript",
+            )
+        return _transcript_executor
+
+
+def _get_ytdlp_semaphore() -> threading.BoundedSemaphore:
+    global _ytdlp_semaphore
+    with _pool_lock:
+        if _ytdlp_semaphore is None:
+            _ytdlp_semaphore = threading.BoundedSemaphore(max(1, get_settings().ytdlp_max_concurrency))
+        return _ytdlp_semaphore
+
+
+def shutdown_transcript_executor() -> None:
+    """Stop the transcript pool (called on app shutdown); running fetches are not waited for."""
+    global _transcript_executor
+    with _pool_lock:
+        if _transcript_executor is not None:
+            _transcript_executor.shutdown(wait=False, cancel_futures=True)
+            _transcript_executor = None
+
 
 def extract_video_id(url: str) -> Optional[str]:
     """Extract YouTube video ID from URL. Supports youtube.com/watch?v=, youtu.be/, embed, /v/. Strips fragment and extra params."""
@@ -68,60 +119,126 @@ def _user_friendly_transcript_error(err: Exception) -> str:
 
 
 def _fetch_transcript_ytdlp(full_url: str, video_id: str) -> Optional[str]:
-    """Fallback: fetch subtitles using yt-dlp. Returns transcript text or None."""
+    """
+    Fallback: fetch subtitles using yt-dlp. Returns transcript text, or None when the video has no
+    usable subtitle track. Raises ValueError (not TranscriptUnavailableError) when yt-dlp failed or
+    could not run in time, so the miss is not cached.
+    """
     try:
         import yt_dlp
     except ImportError:
         logger.warning("yt-dlp not installed, skipping yt-dlp transcript fallback")
         return None
 
-    out_dir = tempfile.mkdtemp(prefix="saiv_yt_")
-    out_tmpl = os.path.join(out_dir, "sub")
+    settings = get_settings()
+    # Cap concurrent yt-dlp runs; give up on the fallback rather than queueing past the fetch timeout
+    semaphore = _get_ytdlp_semaphore()
+    if not semaphore.acquire(timeout=settings.transcript_fetch_timeout_seconds):
+        logger.warning("yt-dlp fallback skipped: too many concurrent runs", video_id=video_id)
+        raise ValueError(_YTDLP_FAILED_MESSAGE)
+    try:
+        return _run_ytdlp(yt_dlp, full_url, video_id)
+    finally:
+        semaphore.release()
+
+
+# Subtitle formats we can parse, in order of preference
+_SUBTITLE_EXTS = ("vtt", "srt")
+_SUBTITLE_READ_BYTES = 64 * 1024
+
+
+def _pick_subtitle_url(info: dict) -> Optional[str]:
+    """Best subtitle track URL from yt-dlp info: manual before automatic captions, then language, then format."""
+    for tracks in (info.get("subtitles") or {}, info.get("automatic_captions") or {}):
+        for lang in TRANSCRIPT_LANGUAGES:
+            formats = tracks.get(lang) or []
+            for ext in _SUBTITLE_EXTS:
+                for fmt in formats:
+                    if fmt.get("ext") == ext and fmt.get("url"):
+                        return fmt["url"]
+    return None
+
+
+def _iter_text_lines(stream) -> Iterator[str]:
+    """Decode a binary stream incrementally and yield its lines, without reading it all first."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = stream.read(_SUBTITLE_READ_BYTES)
+        pending += decoder.decode(chunk or b"", final=not chunk)
+        lines = pending.split("\n")
+        pending = lines.pop()
+        yield from lines
+        if not chunk:
+            break
+    if pending:
+        yield pending
+
+
+def _strip_tags(line: str) -> str:
+    """Remove <...> markup (VTT voice/timestamp/style tags, SRT <i>/<b>) in one scan."""
+    if "<" not in line:
+        return line
+    parts = []
+    pos = 0
+    while True:
+        start = line.find("<", pos)
+        end = line.find(">", start) if start >= 0 else -1
+        if end < 0:
+            parts.append(line[pos:])
+            break
+        parts.append(line[pos:start])
+        pos = end + 1
+    return "".join(parts)
+
+
+def parse_subtitles(lines: Iterable[str]) -> str:
+    """
+    Single pass over VTT/SRT lines: drop headers, cue numbers and timing lines, strip tags,
+    and skip lines repeated from the previous cue (rolling auto-captions). Returns the joined text.
+    """
+    parts = []
+    previous = None
+    for raw in lines:
+        line = raw.strip()
+        if not line or line.isdigit() or "-->" in line or line.startswith(("WEBVTT", "Kind:", "Language:")):
+            continue
+        line = _strip_tags(line).strip()
+        if line and line != previous:
+            parts.append(line)
+            previous = line
+    return " ".join(parts)
+
+
+def _run_ytdlp(yt_dlp, full_url: str, video_id: str) -> Optional[str]:
+    """
+    Resolve the subtitle track URL with yt-dlp and parse it straight from the response stream.
+    None means no usable track; extraction or download errors raise ValueError.
+    """
     opts = {
         "skip_download": True,
-        "writesubtitles": True,
-        "writeautomaticsub": True,
-        "subtitleslangs": ["en", "en-US", "en-GB"],
-        "subtitlesformat": "vtt/srt/best",
-        "outtmpl": out_tmpl,
         "quiet": True,
         "no_warnings": True,
+        "socket_timeout": get_settings().transcript_fetch_timeout_seconds,
     }
 
     try:
         with yt_dlp.YoutubeDL(opts) as ydl:
-            ydl.download([full_url])
-            for name in os.listdir(out_dir):
-                if name.endswith((".vtt", ".srt")):
-                    path = os.path.join(out_dir, name)
-                    with open(path, "r", encoding="utf-8", errors="replace") as f:
-                        content = f.read()
-                    lines = []
-                    for line in content.splitlines():
-                        line = line.strip()
-                        if not line or line.isdigit():
-                            continue
-                        if "-->" in line:
-                            continue
-                        if line.startswith("WEBVTT") or line.startswith("Kind:"):
-                            continue
-                        lines.append(line)
-                    text = " ".join(lines)
-                    text = re.sub(r"<[^>]+>", "", text)
-                    text = clean_text(text)
-                    if len(text) >= 50:
-                        return text
-                    break
+            info = ydl.extract_info(full_url, download=False)
+            sub_url = _pick_subtitle_url(info or {})
+            if not sub_url:
+                return None
+            response = ydl.urlopen(sub_url)
+            try:
+                text = clean_text(parse_subtitles(_iter_text_lines(response)))
+            finally:
+                response.close()
+            if len(text) >= 50:
+                return text
     except Exception as e:
         traceback.print_exc()
         logger.warning("yt-dlp transcript fallback failed", video_id=video_id, error=str(e))
-    finally:
-        try:
-            for name in os.listdir(out_dir):
-                os.remove(os.path.join(out_dir, name))
-            os.rmdir(out_dir)
-        except OSError:
-            pass
+        raise ValueError(_YTDLP_FAILED_MESSAGE) from e
 
     return None
 
@@ -143,15 +260,15 @@ def fetch_transcript(url: str) -> tuple[str, str]:
 
     # 1) get_transcript with explicit language preference
     try:
-        transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=["en", "en-US", "en-GB"])
+        transcript_list = YouTubeTranscriptApi.get_transcript(video_id, languages=TRANSCRIPT_LANGUAGES)
     except TranscriptsDisabled:
         traceback.print_exc()
-        raise ValueError(
+        raise TranscriptUnavailableError(
             "Transcripts are disabled for this video. Try another video with captions (CC) enabled."
         )
     except VideoUnavailable:
         traceback.print_exc()
-        raise ValueError("Video is unavailable or private.")
+        raise TranscriptUnavailableError("Video is unavailable or private.")
     except NoTranscriptFound:
         transcript_list = None
         api_failed_with_exception = None
@@ -168,18 +285,18 @@ def fetch_transcript(url: str) -> tuple[str, str]:
             list_obj = YouTubeTranscriptApi.list_transcripts(video_id)
             # Prefer manually created, then auto-generated
             try:
-                transcript = list_obj.find_manually_created_transcript(["en", "en-US", "en-GB"])
+                transcript = list_obj.find_manually_created_transcript(TRANSCRIPT_LANGUAGES)
             except Exception:
-                transcript = list_obj.find_generated_transcript(["en", "en-US", "en-GB"])
+                transcript = list_obj.find_generated_transcript(TRANSCRIPT_LANGUAGES)
             transcript_list = transcript.fetch()
         except TranscriptsDisabled:
             traceback.print_exc()
-            raise ValueError(
+            raise TranscriptUnavailableError(
                 "Transcripts are disabled for this video. Try another with captions (CC) enabled."
             )
         except VideoUnavailable:
             traceback.print_exc()
-            raise ValueError("Video is unavailable or private.")
+            raise TranscriptUnavailableError("Video is unavailable or private.")
         except NoTranscriptFound:
             pass
         except Exception as list_err:
@@ -201,7 +318,7 @@ def fetch_transcript(url: str) -> tuple[str, str]:
             return f"YouTube Video {video_id}", yt_dlp_text
         if api_failed_with_exception is not None:
             raise ValueError(_user_friendly_transcript_error(api_failed_with_exception))
-        raise ValueError(
+        raise TranscriptUnavailableError(
             "No transcript found for this video. Make sure the video has captions (CC) enabled."
         )
 
@@ -220,8 +337,50 @@ def fetch_transcript(url: str) -> tuple[str, str]:
         yt_dlp_text = _fetch_transcript_ytdlp(full_url, video_id)
         if yt_dlp_text:
             return f"YouTube Video {video_id}", yt_dlp_text
-        raise ValueError(
+        raise TranscriptUnavailableError(
             "Transcript is empty or too short. The video may have minimal captions."
         )
 
     return f"YouTube Video {video_id}", text
+
+
+async def _fetch_transcript_uncached(url: str) -> tuple[str, str]:
+    loop = asyncio.get_event_loop()
+    timeout = get_settings().transcript_fetch_timeout_seconds
+    try:
+        return await asyncio.wait_for(
+            loop.run_in_executor(_get_transcript_executor(), fetch_transcript, url),
+            timeout=timeout,
+        )
+    except asyncio.TimeoutError:
+        logger.warning("Transcript fetch timed out", url=url, timeout=timeout)
+        raise ValueError("Fetching the transcript took too long. Please try again later.") from None
+
+
+async def fetch_transcript_async(url: str) -> tuple[str, str]:
+    """
+    Run fetch_transcript on the dedicated transcript pool with a per-request timeout,
+    so YouTube and yt-dlp calls never block the event loop.
+    Results (and videos without transcripts) are served from the transcript cache when present.
+    """
+    video_id = extract_video_id(url)
+    cache = get_transcript_cache() if video_id else None
+    if cache is None:
+        return await _fetch_transcript_uncached(url)
+
+    key = (video_id, TRANSCRIPT_LANGUAGE)
+    cached = await cache.get(key)
+    if cached is not None:
+        logger.info("Transcript cache hit", video_id=video_id, negative=cached.error is not None)
+        if cached.error is not None:
+            raise TranscriptUnavailableError(cached.error)
+        return cached.title, cached.text
+
+    try:
+        title, text = await _fetch_transcript_uncached(url)
+    except TranscriptUnavailableError as e:
+        await cache.put(key, CachedTranscript(None, None, str(e)))
+        raise
+    # Transient failures (timeouts, parse/network errors) propagate uncached
+    await cache.put(key, CachedTranscript(title, text, None))
+    return title, text
@@ -0,0 +1,75 @@
+"""Okapi BM25 over an in-memory corpus (local stand-in for Postgres full-text search)."""
+
+import heapq
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Postgres' english text search stopwords (snowball english.stop), so ranking matches to_tsvector('english')
+ENGLISH_STOPWORDS = frozenset(
+    """
+    i me my myself we our ours ourselves you your yours yourself yourselves he him his himself she her
+    hers herself it its itself they them their theirs themselves what which who whom this that these
+    those am is are was were be been being have has had having do does did doing a an the and but if
+    or because as until while of at by for with about against between into through during before after
+    above below to from up down in out on off over under again further then once here there when where
+    why how all any both each few more most other some such no nor not only own same so than too very
+    s t can will just don should now
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word tokens (letters, digits, underscore) without English stopwords."""
+    return [token for token in _TOKEN_RE.findall(text.lower()) if token not in ENGLISH_STOPWORDS]
+
+
+class BM25Index:
+    """Inverted index with BM25 scoring. Build once per corpus; search is O(postings of query terms)."""
+
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._tfs: List[Counter] = []
+        self._lengths: List[int] = []
+        self._postings: Dict[str, List[int]] = {}
+        for i, doc in enumerate(documents):
+            tf = Counter(tokenize(doc))
+            self._tfs.append(tf)
+            self._lengths.append(sum(tf.values()))
+            for term in tf:
+                self._postings.setdefault(term, []).append(i)
+        n = len(self._tfs)
+        self._avgdl = sum(self._lengths) / n if n else 0.0
+        self._idf = {
+            term: math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5)) for term, docs in self._postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self._tfs)
+
+    def search(self, query: str, top_k: int, require_all: bool = False) -> List[Tuple[int, float]]:
+        """
+        Best top_k (document index, score) pairs for query; documents sharing no term are not returned.
+        With require_all, only documents containing every query term are (AND, like websearch_to_tsquery).
+        """
+        terms = set(tokenize(query))
+        if require_all:
+            if not terms or any(term not in self._postings for term in terms):
+                return []
+            candidates = set.intersection(*(set(self._postings[term]) for term in terms))
+        scores: Dict[int, float] = {}
+        for term in terms:
+            idf = self._idf.get(term)
+            if idf is None:
+                continue
+            for i in self._postings[term]:
+                if require_all and i not in candidates:
+                    continue
+                f = self._tfs[i][term]
+                length_norm = 1 - self.b + self.b * self._lengths[i] / self._avgdl if self._avgdl else 1.0
+                scores[i] = scores.get(i, 0.0) + idf * f * (self.k1 + 1) / (f + self.k1 * length_norm)
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
@@ -0,0 +1,197 @@
+"""In-process caching utilities."""
+
+import asyncio
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+
+class LRUCache:
+    """Thread-safe LRU cache with optional TTL and hit/miss counters."""
+
+    def __init__(self, max_items: int, ttl_seconds: Optional[float] = None):
+        self.max_items = max(0, max_items)
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at and expires_at < time.monotonic():
+                    del self._data[key]
+                else:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+            self.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        """Store value; ttl_seconds overrides the cache-wide TTL for this entry."""
+        if self.max_items == 0:
+            return
+        ttl = ttl_seconds if ttl_seconds is not None else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl else 0.0
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_items:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Remove every entry whose key matches predicate (O(n); for rare invalidations). Returns the count."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                del self._data[key]
+            return len(stale)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._data), "max_items": self.max_items}
+
+
+class TieredCache:
+    """
+    LRUCache in front of a local SQLite table; SQLite calls run in the default executor.
+
+    Subclasses set table, create_sql, key_columns (the primary key; keys are tuples in this order)
+    and value_columns, and convert values with _to_row / _from_row. With expires, the table also has
+    an expires_at REAL column: puts need a TTL, and expired rows are misses and are purged on open.
+    """
+
+    table: str = ""
+    create_sql: str = ""
+    key_columns: Tuple[str, ...] = ()
+    value_columns: Tuple[str, ...] = ()
+    expires: bool = False
+    # Keys per SELECT (4 bind variables each for the widest key; SQLite allows 32766 per statement)
+    _DISK_BATCH_KEYS = 500
+
+    def __init__(self, path: str, memory_items: int):
+        self.path = path
+        self.memory = LRUCache(memory_items)
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        columns = self.key_columns + self.value_columns + (("expires_at",) if self.expires else ())
+        self._insert_sql = (
+            f"INSERT OR REPLACE INTO {self.table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+        )
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(self.create_sql)
+            if self.expires:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    def _to_row(self, value: Any) -> tuple:
+        """Value columns for value, in value_columns order."""
+        raise NotImplementedError
+
+    def _from_row(self, row: tuple) -> Any:
+        """Value from its value columns."""
+        raise NotImplementedError
+
+    def _select_sql(self, n_keys: int) -> str:
+        selected = self.key_columns + self.value_columns + (("expires_at",) if self.expires else ())
+        placeholder = f"({', '.join('?' * len(self.key_columns))})"
+        return (
+            f"SELECT {', '.join(selected)} FROM {self.table} "
+            f"WHERE ({', '.join(self.key_columns)}) IN (VALUES {', '.join([placeholder] * n_keys)})"
+        )
+
+    def _disk_get_many(self, keys: List[tuple]) -> Dict[tuple, Tuple[Any, Optional[float]]]:
+        """key -> (value, expires_at or None) for the keys stored on disk and not expired."""
+        found: Dict[tuple, Tuple[Any, Optional[float]]] = {}
+        n_key = len(self.key_columns)
+        n_value = len(self.value_columns)
+        now = time.time()
+        for start in range(0, len(keys), self._DISK_BATCH_KEYS):
+            batch = keys[start : start + self._DISK_BATCH_KEYS]
+            params = [part for key in batch for part in key]
+            with self._lock:
+                rows = self._conn.execute(self._select_sql(len(batch)), params).fetchall()
+            for row in rows:
+                expires_at = row[n_key + n_value] if self.expires else None
+                if expires_at is not None and expires_at < now:
+                    continue
+                found[tuple(row[:n_key])] = (self._from_row(row[n_key : n_key + n_value]), expires_at)
+        return found
+
+    def _disk_put_many(self, rows: Iterable[tuple]) -> None:
+        with self._lock:
+            self._conn.executemany(self._insert_sql, rows)
+            self._conn.commit()
+
+    async def get_many(self, keys: Iterable[tuple]) -> Dict[tuple, Any]:
+        """Look up keys in memory, then on disk. Returns only the keys that were found."""
+        found: Dict[tuple, Any] = {}
+        missing: List[tuple] = []
+        for key in dict.fromkeys(keys):
+            value = self.memory.get(key)
+            if value is not None:
+                found[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            loop = asyncio.get_event_loop()
+            from_disk = await loop.run_in_executor(None, self._disk_get_many, missing)
+            for key, (value, expires_at) in from_disk.items():
+                self.memory.set(key, value, ttl_seconds=expires_at - time.time() if expires_at is not None else None)
+                found[key] = value
+            self.disk_hits += len(from_disk)
+            self.misses += len(missing) - len(from_disk)
+        return found
+
+    async def get(self, key: tuple) -> Any:
+        return (await self.get_many([key])).get(key)
+
+    async def put_many(self, items: Dict[tuple, Any], ttl_seconds: Optional[float] = None) -> None:
+        """Store items in memory and on disk (ttl_seconds is required for expiring tables)."""
+        if not items:
+            return
+        if self.expires and not ttl_seconds:
+            raise ValueError(f"{self.table} entries need a TTL")
+        expiry = (time.time() + ttl_seconds,) if self.expires else ()
+        rows = []
+        for key, value in items.items():
+            self.memory.set(key, value, ttl_seconds=ttl_seconds)
+            rows.append((*key, *self._to_row(value), *expiry))
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, self._disk_put_many, rows)
+
+    async def put(self, key: tuple, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        await self.put_many({key: value}, ttl_seconds=ttl_seconds)
+
+    def stats(self) -> dict:
+        return {
+            "memory_hits": self.memory.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_size": len(self.memory),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
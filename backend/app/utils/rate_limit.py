@@ -0,0 +1,136 @@
+"""Async rate limiting and retry helpers for provider API calls."""
+
+import asyncio
+import random
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """Async limiter enforcing requests/min and tokens/min (0 disables a limit). Waiters are served FIFO."""
+
+    def __init__(self, requests_per_minute: int, tokens_per_minute: int):
+        self.rpm = max(0, requests_per_minute)
+        self.tpm = max(0, tokens_per_minute)
+        self._requests = float(self.rpm)
+        self._tokens = float(self.tpm)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.rpm:
+            self._requests = min(float(self.rpm), self._requests + elapsed * self.rpm / 60.0)
+        if self.tpm:
+            self._tokens = min(float(self.tpm), self._tokens + elapsed * self.tpm / 60.0)
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """Wait until one request and `tokens` tokens are available, then take them."""
+        # A single call larger than the whole budget would never fit; let it through on a full bucket
+        tokens = min(tokens, self.tpm) if self.tpm else 0
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = 0.0
+                if self.rpm and self._requests < 1:
+                    wait = max(wait, (1 - self._requests) * 60.0 / self.rpm)
+                if self.tpm and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60.0 / self.tpm)
+                if wait <= 0:
+                    if self.rpm:
+                        self._requests -= 1
+                    if self.tpm:
+                        self._tokens -= tokens
+                    return
+                await asyncio.sleep(wait)
+
+
+# Account-level failures that OpenAI also reports as HTTP 429 but that waiting never clears
+_EXHAUSTED_QUOTA_CODES = ("insufficient_quota", "billing_not_active", "billing_hard_limit_reached")
+
+
+def is_quota_exhausted_error(e: BaseException) -> bool:
+    """True when the account is out of quota or billing (not a transient rate limit)."""
+    codes = [getattr(e, "code", None)]
+    body = getattr(e, "body", None)
+    if isinstance(body, dict):
+        codes.append(body.get("code"))
+        error = body.get("error")
+        if isinstance(error, dict):
+            codes.append(error.get("code"))
+    if any(code in _EXHAUSTED_QUOTA_CODES for code in codes if isinstance(code, str)):
+        return True
+    msg = str(e).lower()
+    return any(code in msg for code in _EXHAUSTED_QUOTA_CODES)
+
+
+def is_rate_limit_error(e: BaseException) -> bool:
+    """True for HTTP 429 / quota-throttling errors from OpenAI, Gemini or plain httpx (exhausted quota excluded)."""
+    if is_quota_exhausted_error(e):
+        return False
+    if _status_code(e) == 429:
+        return True
+    msg = str(e).lower()
+    return "429" in msg or "rate limit" in msg or "resource_exhausted" in msg or "resource exhausted" in msg
+
+
+def is_transient_error(e: BaseException) -> bool:
+    """Rate limits plus server errors (5xx), timeouts and dropped connections: worth retrying."""
+    if is_rate_limit_error(e):
+        return True
+    if is_quota_exhausted_error(e):
+        return False
+    if isinstance(e, httpx.TransportError):
+        return True
+    status = _status_code(e)
+    if status is not None and 500 <= status < 600:
+        return True
+    try:
+        from openai import APIConnectionError  # APITimeoutError is a subclass
+    except ImportError:
+        return False
+    return isinstance(e, APIConnectionError)
+
+
+def _status_code(e: BaseException) -> Optional[int]:
+    return getattr(e, "status_code", None) or getattr(getattr(e, "response", None), "status_code", None)
+
+
+def _retry_after_seconds(e: BaseException) -> Optional[float]:
+    headers = getattr(getattr(e, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+async def retry_with_backoff(
+    call: Callable[[], Awaitable[T]],
+    *,
+    max_retries: int,
+    base_delay: float = 1.0,
+    max_delay: float = 30.0,
+    is_retryable: Callable[[BaseException], bool] = is_rate_limit_error,
+) -> T:
+    """Await call(), retrying retryable errors with exponential backoff and full jitter (honours Retry-After)."""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except Exception as e:
+            if attempt >= max_retries or not is_retryable(e):
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * (2 ** attempt)))
+            retry_after = _retry_after_seconds(e)
+            if retry_after is not None:
+                delay = max(delay, min(retry_after, max_delay))
+            attempt += 1
+            await asyncio.sleep(delay)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Compare ivfflat and HNSW on a synthetic corpus: build time, recall@k and query latency (p50/p95).
+
+Usage (from backend/, with DATABASE_URL set; needs the pgvector extension and psycopg 3):
+    python -m scripts.benchmark_vector_index --rows 50000 --queries 200 --k 5
+    python -m scripts.benchmark_vector_index --ef-search 20,40,80,160 --probes 1,5,10,20
+
+The corpus is clustered unit vectors (like chunks of a few documents) in a scratch table that is
+dropped afterwards. Ground truth is exact cosine top-k computed with NumPy.
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import List
+
+import numpy as np
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+
+from scripts.migrate_vector_index import connect, index_ddl  # noqa: E402
+
+TABLE = "bench_vector_index"
+
+
+def _synthetic_corpus(rows: int, dim: int, clusters: int, rng: np.random.Generator) -> np.ndarray:
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, clusters, size=rows)
+    vectors = centers[labels] + 0.35 * rng.standard_normal((rows, dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors
+
+
+def _queries(corpus: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+    """Perturbed corpus points, so every query has close neighbours (like real questions)."""
+    picks = corpus[rng.integers(0, len(corpus), size=count)]
+    queries = picks + 0.1 * rng.standard_normal(picks.shape).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    return queries
+
+
+def _literal(vector: np.ndarray) -> str:
+    return "[" + ",".join(f"{x:.6f}" for x in vector) + "]"
+
+
+def _load(conn, corpus: np.ndarray) -> None:
+    conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+    conn.execute(f"CREATE TABLE {TABLE} (id INT PRIMARY KEY, embedding vector({corpus.shape[1]}))")
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {TABLE} (id, embedding) FROM STDIN") as copy:
+            for i, vector in enumerate(corpus):
+                copy.write_row((i, _literal(vector)))
+    conn.execute(f"ANALYZE {TABLE}")
+
+
+def _run(conn, setting: str, value: int, queries: List[str], truth: np.ndarray, k: int) -> dict:
+    conn.execute(f"SET {setting} = {int(value)}")
+    latencies = []
+    hits = 0
+    for query, expected in zip(queries, truth):
+        started = time.perf_counter()
+        rows = conn.execute(
+            f"SELECT id FROM {TABLE} ORDER BY embedding <=> %s::vector LIMIT %s", (query, k)
+        ).fetchall()
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len({r[0] for r in rows} & set(expected.tolist()))
+    return {
+        "recall": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p95_ms": float(np.percentile(latencies, 95)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--m", type=int, default=16)
+    parser.add_argument("--ef-construction", type=int, default=64)
+    parser.add_argument("--lists", type=int, default=0, help="ivfflat lists (default rows/1000, min 10)")
+    parser.add_argument("--ef-search", default="20,40,80,160", help="HNSW hnsw.ef_search values to try")
+    parser.add_argument("--probes", default="1,5,10,20", help="ivfflat ivfflat.probes values to try")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch table")
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    corpus = _synthetic_corpus(args.rows, args.dim, args.clusters, rng)
+    query_vectors = _queries(corpus, args.queries, rng)
+    # Exact top-k by cosine similarity (vectors are unit length, so a dot product)
+    scores = query_vectors @ corpus.T
+    truth = np.argsort(-scores, axis=1)[:, : args.k]
+    queries = [_literal(q) for q in query_vectors]
+    lists = args.lists or max(10, args.rows // 1000)
+
+    print(f"corpus={args.rows}x{args.dim} clusters={args.clusters} queries={args.queries} k={args.k}")
+    with connect(args.database_url) as conn:
+        conn.execute("CREATE EXTENSION IF NOT EXISTS vector")
+        conn.execute("SET maintenance_work_mem = '512MB'")
+        started = time.perf_counter()
+        _load(conn, corpus)
+        print(f"loaded in {time.perf_counter() - started:.1f}s")
+        try:
+            runs = [
+                ("ivfflat", "ivfflat.probes", [int(v) for v in args.probes.split(",") if v]),
+                ("hnsw", "hnsw.ef_search", [int(v) for v in args.ef_search.split(",") if v]),
+            ]
+            print(f"\n{'index':<8} {'param':<18} {'recall@k':>9} {'p50 ms':>8} {'p95 ms':>8}")
+            for index, setting, values in runs:
+                conn.execute(f"DROP INDEX IF EXISTS {TABLE}_idx")
+                started = time.perf_counter()
+                conn.execute(
+                    index_ddl(TABLE, f"{TABLE}_idx", index, args.m, args.ef_construction, lists, concurrently=False)
+                )
+                print(f"{index:<8} built in {time.perf_counter() - started:.1f}s")
+                for value in values:
+                    result = _run(conn, setting, value, queries, truth, args.k)
+                    print(
+                        f"{index:<8} {setting.split('.')[1] + '=' + str(value):<18} "
+                        f"{result['recall']:>9.3f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f}"
+                    )
+        finally:
+            if not args.keep:
+                conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+
+
+if __name__ == "__main__":
+    main()
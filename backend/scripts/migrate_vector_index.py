@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Rebuild the document_chunks embedding index as HNSW (default) or ivfflat.
+
+Usage (from backend/, with DATABASE_URL set to the Postgres connection string):
+    python -m scripts.migrate_vector_index --index hnsw --m 16 --ef-construction 64
+    python -m scripts.migrate_vector_index --index ivfflat --lists 100
+    python -m scripts.migrate_vector_index --storage binary    # or halfvec; match VECTOR_STORAGE
+
+Also (re)creates match_document_chunks_hnsw and match_document_chunks_adaptive (database/migrations/).
+--storage binary|halfvec backfills the quantized column, installs the quantized retrieval functions
+(migrations 003 and 005) and drops the float32 HNSW index, which those modes no longer search.
+--storage vector (the default) restores float32 vectors from halfvec rows and rebuilds that index.
+Requires psycopg 3 (pip install "psycopg[binary]"); the API itself does not.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+_BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _BACKEND_DIR not in sys.path:
+    sys.path.insert(0, _BACKEND_DIR)
+
+from app.config import get_settings  # noqa: E402
+
+_MIGRATIONS_DIR = os.path.join(os.path.dirname(_BACKEND_DIR), "database", "migrations")
+# Retrieval functions (re)created after the index swap
+_FUNCTION_MIGRATIONS = ("001_hnsw_index.sql", "002_adaptive_match.sql")
+_QUANTIZED_FUNCTION_MIGRATIONS = ("003_quantized_storage.sql", "005_halfvec_match.sql")
+
+# Per quantized mode: backfill statement and the HNSW index it searches instead of the float32 one
+_QUANTIZED_BACKFILL = {
+    "binary": (
+        "UPDATE document_chunks SET embedding_bit = binary_quantize(embedding)::bit(1536) "
+        "WHERE embedding_bit IS NULL AND embedding IS NOT NULL",
+        "document_chunks_embedding_bit_idx",
+        "embedding_bit bit_hamming_ops",
+    ),
+    "halfvec": (
+        "UPDATE document_chunks SET embedding_half = embedding::halfvec(1536), embedding = NULL "
+        "WHERE embedding IS NOT NULL",
+        "document_chunks_embedding_half_idx",
+        "embedding_half halfvec_cosine_ops",
+    ),
+}
+
+
+def connect(database_url: str = ""):
+    """Autocommit psycopg connection (CREATE INDEX CONCURRENTLY cannot run in a transaction)."""
+    try:
+        import psycopg
+    except ImportError:
+        sys.exit('This script needs psycopg 3: pip install "psycopg[binary]"')
+    url = database_url or get_settings().database_url
+    if not url:
+        sys.exit("Set DATABASE_URL (Supabase: Project Settings -> Database -> Connection string)")
+    return psycopg.connect(url, autocommit=True)
+
+
+def index_ddl(table: str, name: str, index: str, m: int, ef_construction: int, lists: int, concurrently: bool) -> str:
+    """CREATE INDEX statement for a cosine-distance vector index."""
+    mode = "CONCURRENTLY " if concurrently else ""
+    if index == "hnsw":
+        return (
+            f"CREATE INDEX {mode}{name} ON {table} USING hnsw (embedding vector_cosine_ops) "
+            f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+        )
+    return f"CREATE INDEX {mode}{name} ON {table} USING ivfflat (embedding vector_cosine_ops) WITH (lists = {int(lists)})"
+
+
+def _function_sql(filename: str) -> str:
+    """The CREATE FUNCTION statement of a migration file (everything from the first one on)."""
+    with open(os.path.join(_MIGRATIONS_DIR, filename), "r", encoding="utf-8") as f:
+        sql = f.read()
+    return sql[sql.index("CREATE OR REPLACE FUNCTION") :]
+
+
+def _migration_sql(filename: str) -> str:
+    with open(os.path.join(_MIGRATIONS_DIR, filename), "r", encoding="utf-8") as f:
+        return f.read()
+
+
+def migrate_quantized(conn, storage: str, m: int, ef_construction: int) -> None:
+    """Backfill the quantized column, build its index and drop the float32 HNSW index."""
+    backfill, index_name, opclass = _QUANTIZED_BACKFILL[storage]
+    for filename in _QUANTIZED_FUNCTION_MIGRATIONS:
+        conn.execute(_migration_sql(filename))
+    started = time.perf_counter()
+    rows = conn.execute(backfill).rowcount
+    print(f"Backfilled {rows} chunks in {time.perf_counter() - started:.1f}s")
+    conn.execute(
+        f"CREATE INDEX IF NOT EXISTS {index_name} ON document_chunks USING hnsw ({opclass}) "
+        f"WITH (m = {int(m)}, ef_construction = {int(ef_construction)})"
+    )
+    conn.execute("DROP INDEX IF EXISTS document_chunks_embedding_idx")
+    conn.execute("ANALYZE document_chunks")
+    if storage == "halfvec":
+        print("Float32 vectors cleared; run VACUUM FULL document_chunks to return the space (locks the table)")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", choices=("hnsw", "ivfflat"), default="hnsw")
+    parser.add_argument(
+        "--storage", choices=("vector", "halfvec", "binary"), default="vector", help="VECTOR_STORAGE mode to migrate to"
+    )
+    parser.add_argument("--m", type=int, default=16, help="HNSW: max connections per layer")
+    parser.add_argument("--ef-construction", type=int, default=64, help="HNSW: candidate list size while building")
+    parser.add_argument("--lists", type=int, default=100, help="ivfflat: number of lists (~rows/1000)")
+    parser.add_argument("--maintenance-work-mem", default="512MB")
+    parser.add_argument("--no-concurrently", action="store_true", help="Lock the table instead of building online")
+    parser.add_argument("--database-url", default="")
+    args = parser.parse_args()
+
+    ddl = index_ddl(
+        "document_chunks",
+        "document_chunks_embedding_idx_new",
+        args.index,
+        args.m,
+        args.ef_construction,
+        args.lists,
+        concurrently=not args.no_concurrently,
+    )
+    if args.storage != "vector":
+        with connect(args.database_url) as conn:
+            conn.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+            migrate_quantized(conn, args.storage, args.m, args.ef_construction)
+        print(f"Chunks migrated to {args.storage} storage; set VECTOR_STORAGE={args.storage} in the API env")
+        return
+
+    with connect(args.database_url) as conn:
+        conn.execute(f"SET maintenance_work_mem = '{args.maintenance_work_mem}'")
+        # Rows moved to halfvec-only storage get their float32 vector back (from the float16 values)
+        conn.execute(
+            "UPDATE document_chunks SET embedding = embedding_half::vector(1536) "
+            "WHERE embedding IS NULL AND embedding_half IS NOT NULL"
+        )
+        # Build the new index next to the old one so searches stay indexed during the build
+        conn.execute("DROP INDEX IF EXISTS document_chunks_embedding_idx_new")
+        print(ddl)
+        started = time.perf_counter()
+        conn.execute(ddl)
+        print(f"Built in {time.perf_counter() - started:.1f}s")
+        conn.execute("DROP INDEX IF EXISTS document_chunks_embedding_idx")
+        conn.execute("ALTER INDEX document_chunks_embedding_idx_new RENAME TO document_chunks_embedding_idx")
+        for filename in _FUNCTION_MIGRATIONS:
+            conn.execute(_function_sql(filename))
+        conn.execute("ANALYZE document_chunks")
+    print(f"document_chunks_embedding_idx is now {args.index}; retrieval functions installed")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from app.services import ai_service
+
+
+def collect(settings, openai_stream, gemini_stream):
+    async def scenario():
+        out = []
+        async for chunk in ai_service.chat_completion_stream([{"role": "user", "content": "q"}], "context"):
+            out.append(chunk)
+        return out
+
+    with mock.patch.object(ai_service, "get_settings", return_value=settings), mock.patch.object(
+        ai_service, "_chat_stream_openai", openai_stream
+    ), mock.patch.object(ai_service, "_chat_stream_gemini", gemini_stream):
+        return asyncio.run(scenario())
+
+
+async def answer_from_gemini(messages, context):
+    yield "Gemini answer."
+
+
+async def fails_after_first_chunk(messages, context):
+    yield "The answer "
+    raise RuntimeError("connection dropped")
+
+
+async def fails_before_output(messages, context):
+    raise RuntimeError("connection refused")
+    yield  # pragma: no cover
+
+
+SETTINGS = mock.Mock(ai_provider="auto", openai_api_key="sk-test", gemini_api_key="g-test")
+
+
+def test_partial_stream_raises_instead_of_falling_back():
+    # Regression: a second provider's answer must not be appended to a half-sent first answer
+    gemini = mock.Mock(side_effect=answer_from_gemini)
+    out = []
+
+    async def scenario():
+        async for chunk in ai_service.chat_completion_stream([], "context"):
+            out.append(chunk)
+
+    with mock.patch.object(ai_service, "get_settings", return_value=SETTINGS), mock.patch.object(
+        ai_service, "_chat_stream_openai", fails_after_first_chunk
+    ), mock.patch.object(ai_service, "_chat_stream_gemini", gemini):
+        with pytest.raises(ValueError, match="connection dropped"):
+            asyncio.run(scenario())
+    assert out == ["The answer "]
+    gemini.assert_not_called()
+
+
+def test_falls_back_when_nothing_was_sent():
+    assert collect(SETTINGS, fails_before_output, answer_from_gemini) == ["Gemini answer."]
+
+
+def test_gemini_first_partial_stream_raises():
+    settings = mock.Mock(ai_provider="auto", openai_api_key="", gemini_api_key="g-test")
+    with pytest.raises(ValueError, match="connection dropped"):
+        collect(settings, answer_from_gemini, fails_after_first_chunk)
@@ -0,0 +1,38 @@
+from app.utils.bm25 import BM25Index, tokenize
+
+CHUNKS = [
+    "The mitochondria is the powerhouse of the cell.",
+    "Photosynthesis happens in the chloroplast of a plant cell.",
+    "The cell membrane controls what enters and leaves the cell.",
+    "Unrelated text about football and weather.",
+]
+
+
+def test_tokenize_drops_stopwords_and_case():
+    assert tokenize("The Cell and THE membrane") == ["cell", "membrane"]
+
+
+def test_search_ranks_matching_chunks_and_skips_non_matching():
+    index = BM25Index(CHUNKS)
+    results = index.search("cell membrane", top_k=10)
+    ranked = [i for i, _ in results]
+    assert ranked[0] == 2
+    assert 3 not in ranked
+    assert all(score > 0 for _, score in results)
+
+
+def test_search_respects_top_k():
+    assert len(BM25Index(CHUNKS).search("cell", top_k=2)) == 2
+
+
+def test_require_all_only_returns_chunks_with_every_term():
+    index = BM25Index(CHUNKS)
+    assert [i for i, _ in index.search("cell chloroplast", top_k=10, require_all=True)] == [1]
+    assert index.search("cell spaceship", top_k=10, require_all=True) == []
+
+
+def test_stopword_only_and_empty_queries_match_nothing():
+    index = BM25Index(CHUNKS)
+    assert index.search("the of and", top_k=5) == []
+    assert index.search("the of and", top_k=5, require_all=True) == []
+    assert BM25Index([]).search("cell", top_k=5) == []
@@ -0,0 +1,95 @@
+import asyncio
+
+import numpy as np
+
+from app.services.embedding_cache import EmbeddingCache
+from app.services.transcript_cache import CachedTranscript, TranscriptCache
+from app.utils import cache as cache_module
+from app.utils.cache import LRUCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+
+
+def test_lru_ttl_and_per_entry_override(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    cache = LRUCache(10, ttl_seconds=10)
+    cache.set("default", 1)
+    cache.set("short", 2, ttl_seconds=1)
+    clock.now += 5
+    assert cache.get("short") is None
+    assert cache.get("default") == 1
+    clock.now += 6
+    assert cache.get("default") is None
+    assert cache.stats()["misses"] == 2
+
+
+def test_lru_pop_matching():
+    cache = LRUCache(10)
+    cache.set(("doc1", "vector", "q1"), 1)
+    cache.set(("doc1", "lexical", "q2"), 2)
+    cache.set(("doc2", "vector", "q1"), 3)
+    assert cache.pop_matching(lambda key: key[0] == "doc1") == 2
+    assert len(cache) == 1
+    assert cache.get(("doc2", "vector", "q1")) == 3
+
+
+def test_embedding_cache_round_trip_through_disk(tmp_path):
+    path = str(tmp_path / "embeddings.sqlite3")
+    items = {("openai", "m", 3, f"h{i}"): np.arange(3, dtype=np.float32) + i for i in range(1200)}
+
+    async def scenario():
+        writer = EmbeddingCache(path, memory_items=10)
+        await writer.put_many(items)
+        writer.close()
+        reader = EmbeddingCache(path, memory_items=10)
+        found = await reader.get_many(list(items) + [("openai", "m", 3, "missing")])
+        return found, reader.stats()
+
+    found, stats = asyncio.run(scenario())
+    assert len(found) == 1200
+    np.testing.assert_array_equal(found[("openai", "m", 3, "h7")], [7, 8, 9])
+    assert stats["disk_hits"] == 1200 and stats["misses"] == 1
+
+
+def test_transcript_cache_expires_failures_sooner(tmp_path, monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module.time, "time", clock)
+    monkeypatch.setattr(cache_module.time, "monotonic", clock)
+    path = str(tmp_path / "transcripts.sqlite3")
+
+    async def scenario():
+        cache = TranscriptCache(path, memory_items=10, ttl_seconds=3600, negative_ttl_seconds=60)
+        await cache.put(("ok", "en"), CachedTranscript("Title", "text", None))
+        await cache.put(("bad", "en"), CachedTranscript(None, None, "No transcript"))
+        cache.close()
+        reopened = TranscriptCache(path, memory_items=10, ttl_seconds=3600, negative_ttl_seconds=60)
+        fresh = (await reopened.get(("ok", "en")), await reopened.get(("bad", "en")))
+        clock.now += 120
+        # Expired in memory, and skipped on disk
+        reopened.memory.clear()
+        later = (await reopened.get(("ok", "en")), await reopened.get(("bad", "en")))
+        reopened.close()
+        return fresh, later
+
+    (ok, bad), (ok_later, bad_later) = asyncio.run(scenario())
+    assert ok == CachedTranscript("Title", "text", None)
+    assert bad.error == "No transcript"
+    assert ok_later == ok
+    assert bad_later is None
@@ -0,0 +1,28 @@
+import numpy as np
+
+from app.services.embeddings import _pad_and_normalize, to_bit_string
+
+
+def test_pad_and_normalize_pads_short_vectors():
+    out = _pad_and_normalize([[3.0, 4.0]], 4)
+    assert out.dtype == np.float32
+    assert out.shape == (1, 4)
+    np.testing.assert_allclose(out[0], [0.6, 0.8, 0.0, 0.0], rtol=1e-6)
+
+
+def test_pad_and_normalize_truncates_long_vectors():
+    out = _pad_and_normalize(np.array([[1.0, 0.0, 5.0, 5.0]]), 2)
+    np.testing.assert_allclose(out, [[1.0, 0.0]])
+
+
+def test_pad_and_normalize_keeps_zero_vectors_and_accepts_1d():
+    np.testing.assert_array_equal(_pad_and_normalize([[0.0, 0.0]], 3), [[0.0, 0.0, 0.0]])
+    assert _pad_and_normalize([1.0, 1.0], 2).shape == (1, 2)
+
+
+def test_pad_and_normalize_empty_input():
+    assert _pad_and_normalize([], 8).shape == (0, 8)
+
+
+def test_to_bit_string_marks_positive_components():
+    assert to_bit_string(np.array([0.5, -0.1, 0.0, 2.0], dtype=np.float32)) == "1001"
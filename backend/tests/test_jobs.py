@@ -0,0 +1,61 @@
+import asyncio
+
+from app.services.jobs import STATUS_SUCCEEDED, InMemoryJobStore, JobQueue
+
+
+def make_queue():
+    return JobQueue(InMemoryJobStore(), workers=1, max_queued=10, retention_seconds=3600)
+
+
+def test_submit_coalesces_jobs_with_the_same_key():
+    runs = []
+
+    async def scenario():
+        queue = make_queue()
+        release = asyncio.Event()
+
+        async def run(progress):
+            runs.append(1)
+            await release.wait()
+            return {"document_id": "doc-1"}
+
+        first = queue.submit("pdf", "doc-1", run, key="pdf:abc")
+        second = queue.submit("pdf", "doc-2", run, key="pdf:abc")
+        other = queue.submit("pdf", "doc-3", run, key="pdf:def")
+        release.set()
+        await queue._queue.join()
+        after = queue.submit("pdf", "doc-4", run, key="pdf:abc")
+        await queue._queue.join()
+        finished = queue.get(first.id)
+        await queue.stop()
+        return first, second, other, after, finished
+
+    first, second, other, after, finished = asyncio.run(scenario())
+    assert second is first
+    assert other.id != first.id
+    # Once the first job finished, the same key schedules a new run
+    assert after.id != first.id
+    assert len(runs) == 3
+    assert finished.status == STATUS_SUCCEEDED
+
+
+def test_stop_drops_queued_jobs_and_calls_on_drop():
+    dropped = []
+
+    async def scenario():
+        queue = make_queue()
+        blocker = asyncio.Event()
+
+        async def run(progress):
+            await blocker.wait()
+            return {}
+
+        queue.submit("pdf", "doc-1", run, key="a")
+        queued = queue.submit("pdf", "doc-2", run, key="b", on_drop=lambda: dropped.append("doc-2"))
+        await asyncio.sleep(0)
+        await queue.stop()
+        return queue.get(queued.id)
+
+    job = asyncio.run(scenario())
+    assert dropped == ["doc-2"]
+    assert job.status == "failed"
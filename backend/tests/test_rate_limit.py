@@ -0,0 +1,113 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.utils import rate_limit
+from app.utils.rate_limit import TokenBucket, is_transient_error, retry_with_backoff
+
+
+class FakeTime:
+    """Stands in for time.monotonic and asyncio.sleep: sleeping advances the clock instantly."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def fake_time(monkeypatch):
+    fake = FakeTime()
+    monkeypatch.setattr(rate_limit.time, "monotonic", fake.monotonic)
+    monkeypatch.setattr(rate_limit.asyncio, "sleep", fake.sleep)
+    return fake
+
+
+class StatusError(Exception):
+    def __init__(self, status_code, message="error"):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+def test_token_bucket_waits_for_request_budget(fake_time):
+    bucket = TokenBucket(requests_per_minute=60, tokens_per_minute=0)
+
+    async def scenario():
+        for _ in range(61):
+            await bucket.acquire()
+
+    asyncio.run(scenario())
+    # 60 requests fit the initial budget; the 61st waits for one second of refill
+    assert fake_time.sleeps == [pytest.approx(1.0)]
+
+
+def test_token_bucket_waits_for_token_budget(fake_time):
+    bucket = TokenBucket(requests_per_minute=0, tokens_per_minute=600)
+
+    async def scenario():
+        await bucket.acquire(500)
+        await bucket.acquire(200)
+
+    asyncio.run(scenario())
+    # 100 tokens left; 100 more refill in 10s at 600/min
+    assert sum(fake_time.sleeps) == pytest.approx(10.0)
+
+
+def test_token_bucket_lets_oversized_call_through_on_full_bucket(fake_time):
+    asyncio.run(TokenBucket(requests_per_minute=0, tokens_per_minute=100).acquire(5000))
+    assert fake_time.sleeps == []
+
+
+def test_retry_with_backoff_retries_retryable_errors(fake_time):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        if len(calls) < 3:
+            raise StatusError(429, "rate limit")
+        return "ok"
+
+    assert asyncio.run(retry_with_backoff(call, max_retries=5, base_delay=1.0)) == "ok"
+    assert len(calls) == 3
+    assert len(fake_time.sleeps) == 2
+    assert all(0 <= delay <= 2.0 for delay in fake_time.sleeps)
+
+
+def test_retry_with_backoff_gives_up_after_max_retries(fake_time):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise StatusError(429, "rate limit")
+
+    with pytest.raises(StatusError):
+        asyncio.run(retry_with_backoff(call, max_retries=2))
+    assert len(calls) == 3
+
+
+def test_retry_with_backoff_does_not_retry_other_errors(fake_time):
+    calls = []
+
+    async def call():
+        calls.append(1)
+        raise StatusError(400, "bad request")
+
+    with pytest.raises(StatusError):
+        asyncio.run(retry_with_backoff(call, max_retries=5))
+    assert len(calls) == 1
+    assert fake_time.sleeps == []
+
+
+def test_transient_errors():
+    assert is_transient_error(StatusError(429, "rate limit"))
+    assert is_transient_error(StatusError(503))
+    assert is_transient_error(httpx.ConnectError("connection reset"))
+    assert not is_transient_error(StatusError(400))
+    assert not is_transient_error(StatusError(429, "insufficient_quota"))
@@ -0,0 +1,21 @@
+from app.services.rag_service import _reciprocal_rank_fusion
+
+
+def rows(*indices):
+    return [{"chunk_index": i, "content": f"chunk {i}"} for i in indices]
+
+
+def test_rrf_favours_chunks_ranked_well_in_both_lists():
+    fused = _reciprocal_rank_fusion([rows(1, 2, 3), rows(3, 1, 4)], k=60)
+    assert [r["chunk_index"] for r in fused] == [1, 3, 2, 4]
+
+
+def test_rrf_keeps_first_row_seen_for_a_chunk():
+    vector = [{"chunk_index": 7, "content": "a", "similarity": 0.9}]
+    lexical = [{"chunk_index": 7, "content": "a", "lexical_rank": 1}]
+    assert _reciprocal_rank_fusion([vector, lexical], k=60) == vector
+
+
+def test_rrf_handles_empty_rankings():
+    assert _reciprocal_rank_fusion([[], []], k=60) == []
+    assert [r["chunk_index"] for r in _reciprocal_rank_fusion([rows(5, 6), []], k=60)] == [5, 6]
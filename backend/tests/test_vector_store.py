@@ -0,0 +1,50 @@
+import asyncio
+import uuid
+
+import numpy as np
+
+from app.services.vector_store import LocalVectorStore
+
+CHUNKS = ["alpha particles", "beta decay", "gamma rays and alpha"]
+
+
+def unit(*values):
+    v = np.array(values, dtype=np.float32)
+    return v / np.linalg.norm(v)
+
+
+def make_store(tmp_path):
+    store = LocalVectorStore(str(tmp_path / "vectors"))
+    document_id = str(uuid.uuid4())
+    embeddings = np.stack([unit(1, 0, 0), unit(0, 1, 0), unit(0.7, 0, 0.7)])
+    asyncio.run(store.add(document_id, CHUNKS, embeddings))
+    return store, document_id
+
+
+def test_search_returns_nearest_chunks_first(tmp_path):
+    store, document_id = make_store(tmp_path)
+    results = store.search(document_id, unit(1, 0, 0.1), limit=2)
+    assert [r["chunk_index"] for r in results] == [0, 2]
+    assert results[0]["content"] == "alpha particles"
+    assert results[0]["similarity"] > results[1]["similarity"]
+
+
+def test_lexical_search(tmp_path):
+    store, document_id = make_store(tmp_path)
+    assert {r["chunk_index"] for r in store.lexical_search(document_id, "alpha", 5)} == {0, 2}
+    assert [r["chunk_index"] for r in store.lexical_search(document_id, "alpha gamma", 5, require_all=True)] == [2]
+
+
+def test_documents_survive_reopening(tmp_path):
+    store, document_id = make_store(tmp_path)
+    store.close()
+    reopened = LocalVectorStore(str(tmp_path / "vectors"))
+    assert reopened.search(document_id, unit(0, 1, 0), limit=1)[0]["chunk_index"] == 1
+
+
+def test_delete_and_unknown_documents(tmp_path):
+    store, document_id = make_store(tmp_path)
+    asyncio.run(store.delete(document_id))
+    assert store.search(document_id, unit(1, 0, 0), limit=3) == []
+    assert store.search("not-a-uuid", unit(1, 0, 0), limit=3) == []
+    assert store.lexical_search(str(uuid.uuid4()), "alpha", 3) == []
@@ -0,0 +1,36 @@
+from app.services.youtube import parse_subtitles
+
+VTT = """WEBVTT
+Kind: captions
+Language: en
+
+00:00:00.000 --> 00:00:02.000 align:start position:0%
+hello<00:00:00.500><c> world</c>
+
+00:00:02.000 --> 00:00:04.000
+hello world
+
+00:00:04.000 --> 00:00:06.000
+<v Speaker>second line</v>
+"""
+
+SRT = """1
+00:00:01,000 --> 00:00:02,000
+<i>First</i> caption
+
+2
+00:00:02,000 --> 00:00:03,000
+Second caption
+"""
+
+
+def test_parse_vtt_drops_headers_timings_tags_and_rolling_repeats():
+    assert parse_subtitles(VTT.splitlines()) == "hello world second line"
+
+
+def test_parse_srt_drops_cue_numbers():
+    assert parse_subtitles(SRT.splitlines()) == "First caption Second caption"
+
+
+def test_parse_empty():
+    assert parse_subtitles([]) == ""
@@ -0,0 +1,44 @@
+-- Migration 000: duplicate-content detection and completed-indexing marker on documents.
+-- Adds documents.content_hash and documents.chunk_count (both used by the API for dedup and by
+-- migration 002's adaptive retrieval) and the unique index on (source_type, content_hash).
+-- Run in the Supabase SQL editor before the other migrations; safe to re-run.
+--
+-- NULL handling:
+--   content_hash NULL: the row is not deduplicated. Unique indexes treat NULLs as distinct, so any
+--     number of unhashed rows can coexist. Old PDF rows stay NULL (their source_id only hashed the
+--     first 1KB, and the full bytes are not stored), so re-uploading such a PDF indexes it again.
+--   chunk_count NULL: indexing has not finished. The API answers "already being processed" for such
+--     a claim and replaces it once it is 30 minutes old, so old rows without chunks are re-indexed
+--     on the next upload rather than blocking it.
+
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash CHAR(64);  -- sha256 of the PDF bytes / video_id
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER;    -- set once all chunks are stored
+
+-- Backfill chunk_count for documents that already have chunks (written by the previous version,
+-- which had no marker); documents with none keep NULL
+UPDATE documents d
+SET chunk_count = c.n
+FROM (SELECT document_id, count(*)::INT AS n FROM document_chunks GROUP BY document_id) c
+WHERE d.id = c.document_id AND d.chunk_count IS NULL;
+
+-- Backfill YouTube hashes: the API uses sha256(video_id), and source_id is the video_id. When a
+-- video was ingested more than once, only the newest indexed row gets the hash (the unique index
+-- below would reject the others); older copies stay NULL and can be deleted at leisure.
+UPDATE documents d
+SET content_hash = encode(sha256(convert_to(d.source_id, 'UTF8')), 'hex')
+FROM (
+    SELECT DISTINCT ON (source_id) id
+    FROM documents
+    WHERE source_type = 'youtube' AND chunk_count IS NOT NULL
+    ORDER BY source_id, created_at DESC
+) newest
+WHERE d.id = newest.id
+  AND d.content_hash IS NULL
+  AND NOT EXISTS (
+      SELECT 1 FROM documents other
+      WHERE other.source_type = 'youtube'
+        AND other.content_hash = encode(sha256(convert_to(d.source_id, 'UTF8')), 'hex')
+  );
+
+-- One document per identical content (rows without a hash are not constrained)
+CREATE UNIQUE INDEX IF NOT EXISTS documents_content_hash_idx ON documents(source_type, content_hash);
@@ -0,0 +1,44 @@
+-- Migration 001: replace the ivfflat chunk index with HNSW and add match_document_chunks_hnsw.
+-- Run in the Supabase SQL editor (or: python -m scripts.migrate_vector_index from backend/).
+-- Building HNSW over many chunks can take a while; raising maintenance_work_mem speeds it up.
+-- Tune m / ef_construction below (defaults 16 / 64); larger values = better recall, slower build.
+
+SET maintenance_work_mem = '512MB';
+
+DROP INDEX IF EXISTS document_chunks_embedding_idx;
+
+CREATE INDEX document_chunks_embedding_idx
+ON document_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION match_document_chunks_hnsw(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+BEGIN
+    -- is_local = true: the setting ends with this call's transaction
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        1 - (dc.embedding <=> query_embedding) AS similarity
+    FROM document_chunks dc
+    WHERE dc.document_id = match_document_id
+      AND dc.embedding IS NOT NULL
+    ORDER BY dc.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,70 @@
+-- Migration 002: add match_document_chunks_adaptive (exact scan for small documents, iterative
+-- HNSW scan for large ones). Requires migration 001. Iterative scans need pgvector >= 0.8.
+
+-- Retrieval with a per-document strategy. Small documents (<= exact_scan_max_chunks chunks): exact
+-- distances over the document's rows via the document_id index. Large documents: HNSW with
+-- iterative scanning, so filtering to the document never leaves fewer than match_count rows.
+CREATE OR REPLACE FUNCTION match_document_chunks_adaptive(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        -- MATERIALIZED keeps the planner from turning this into a global ANN scan + post-filter
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND dc.embedding IS NOT NULL
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- is_local = true: settings end with this call's transaction
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector < 0.8 has no iterative scans; ef_search alone bounds the candidates
+    END;
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        1 - (dc.embedding <=> query_embedding) AS similarity
+    FROM document_chunks dc
+    WHERE dc.document_id = match_document_id
+      AND dc.embedding IS NOT NULL
+    ORDER BY dc.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,182 @@
+-- Migration 003: quantized embedding storage (pgvector >= 0.7). Adds halfvec / bit columns, their
+-- HNSW indexes and the quantized retrieval functions (halfvec is replaced by migration 005).
+-- Then set VECTOR_STORAGE in the API env.
+--
+-- Existing chunks keep working: small documents are scanned exactly either way. To switch a database
+-- to a quantized mode, run from backend/ (backfills the new column and drops the float32 HNSW index,
+-- which binary/halfvec retrieval no longer searches, so index memory actually shrinks):
+--   python -m scripts.migrate_vector_index --storage binary    # or halfvec
+-- The equivalent SQL, for the SQL editor:
+--
+-- binary (index memory ~32x smaller; full vectors kept for re-ranking):
+--   UPDATE document_chunks SET embedding_bit = binary_quantize(embedding)::bit(1536)
+--   WHERE embedding_bit IS NULL AND embedding IS NOT NULL;
+--   DROP INDEX IF EXISTS document_chunks_embedding_idx;
+--
+-- halfvec (table and index ~2x smaller):
+--   UPDATE document_chunks SET embedding_half = embedding::halfvec(1536), embedding = NULL
+--   WHERE embedding IS NOT NULL;
+--   DROP INDEX IF EXISTS document_chunks_embedding_idx;
+--   VACUUM FULL document_chunks;  -- return the freed space (locks the table)
+
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS embedding_half halfvec(1536);
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS embedding_bit bit(1536);
+
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_half_idx
+ON document_chunks
+USING hnsw (embedding_half halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_bit_idx
+ON document_chunks
+USING hnsw (embedding_bit bit_hamming_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Quantized retrieval (vector_storage = "binary" | "halfvec" in the API settings). Both take
+-- rerank_candidates ANN candidates from the small index, then re-order them by exact distance.
+-- Small documents are scanned exactly, as in match_document_chunks_adaptive.
+CREATE OR REPLACE FUNCTION match_document_chunks_binary(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000,
+    rerank_candidates INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+    n_candidates INT := GREATEST(rerank_candidates, match_count);
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND dc.embedding IS NOT NULL
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- Hamming-distance candidates from the bit index, re-ranked by cosine on the full vectors
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, n_candidates), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding
+        FROM document_chunks dc
+        WHERE dc.document_id = match_document_id
+          AND dc.embedding_bit IS NOT NULL
+        ORDER BY dc.embedding_bit <~> binary_quantize(query_embedding)::bit(1536)
+        LIMIT n_candidates
+    )
+    SELECT
+        c.id,
+        c.document_id,
+        c.chunk_index,
+        c.content,
+        1 - (c.embedding <=> query_embedding) AS similarity
+    FROM candidates c
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION match_document_chunks_halfvec(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000,
+    rerank_candidates INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+    n_candidates INT := GREATEST(rerank_candidates, match_count);
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        -- COALESCE: chunks written before the switch to halfvec still have full vectors
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content,
+                   COALESCE(dc.embedding, dc.embedding_half::vector(1536)) AS embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND (dc.embedding IS NOT NULL OR dc.embedding_half IS NOT NULL)
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- Candidates from the halfvec index, re-ordered by exact distance to the float32 query
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, n_candidates), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding_half::vector(1536) AS embedding
+        FROM document_chunks dc
+        WHERE dc.document_id = match_document_id
+          AND dc.embedding_half IS NOT NULL
+        ORDER BY dc.embedding_half <=> query_embedding::halfvec(1536)
+        LIMIT n_candidates
+    )
+    SELECT
+        c.id,
+        c.document_id,
+        c.chunk_index,
+        c.content,
+        1 - (c.embedding <=> query_embedding) AS similarity
+    FROM candidates c
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
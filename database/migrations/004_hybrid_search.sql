@@ -0,0 +1,76 @@
+-- Migration 004: hybrid lexical + vector retrieval. Adds a generated tsvector column (rewrites the
+-- table once), its GIN index, and the lexical / hybrid retrieval functions. Requires migration 002.
+
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+CREATE INDEX IF NOT EXISTS document_chunks_content_tsv_idx
+ON document_chunks
+USING gin (content_tsv);
+
+-- Full-text search over a document's chunks (websearch syntax: quoted phrases, OR, -exclusions)
+CREATE OR REPLACE FUNCTION match_document_chunks_lexical(
+    query_text TEXT,
+    match_document_id UUID,
+    match_count INT DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    lexical_score FLOAT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        ts_rank_cd(dc.content_tsv, q)::FLOAT AS lexical_score
+    FROM document_chunks dc, websearch_to_tsquery('english', query_text) q
+    WHERE dc.document_id = match_document_id
+      AND dc.content_tsv @@ q
+    ORDER BY ts_rank_cd(dc.content_tsv, q) DESC
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Vector (adaptive) and full-text search in one round trip. Returns the union of both top lists
+-- with each chunk's rank in either (NULL when absent); the API fuses them with reciprocal rank fusion.
+CREATE OR REPLACE FUNCTION match_document_chunks_hybrid(
+    query_embedding vector(1536),
+    query_text TEXT,
+    match_document_id UUID,
+    match_count INT DEFAULT 10,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000
+)
+RETURNS TABLE (
+    chunk_index INT,
+    content TEXT,
+    vector_rank INT,
+    lexical_rank INT
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH vec AS (
+        SELECT m.chunk_index, m.content, (row_number() OVER (ORDER BY m.similarity DESC))::INT AS r
+        FROM match_document_chunks_adaptive(
+            query_embedding, match_document_id, match_count, ef_search, exact_scan_max_chunks
+        ) m
+    ),
+    lex AS (
+        SELECT l.chunk_index, l.content, (row_number() OVER (ORDER BY l.lexical_score DESC))::INT AS r
+        FROM match_document_chunks_lexical(query_text, match_document_id, match_count) l
+    )
+    SELECT
+        COALESCE(vec.chunk_index, lex.chunk_index),
+        COALESCE(vec.content, lex.content),
+        vec.r,
+        lex.r
+    FROM vec
+    FULL OUTER JOIN lex ON vec.chunk_index = lex.chunk_index;
+END;
+$$ LANGUAGE plpgsql;
@@ -0,0 +1,71 @@
+-- Migration 005: match_document_chunks_halfvec without the re-ranking step. halfvec mode stores only
+-- float16 values, so re-scoring the candidates could not recover any precision; the function now
+-- returns the halfvec HNSW order directly and no longer takes rerank_candidates. Requires 003.
+
+DROP FUNCTION IF EXISTS match_document_chunks_halfvec(vector, UUID, INT, INT, INT, INT);
+
+CREATE OR REPLACE FUNCTION match_document_chunks_halfvec(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        -- COALESCE: chunks written before the switch to halfvec still have full vectors
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content,
+                   COALESCE(dc.embedding, dc.embedding_half::vector(1536)) AS embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND (dc.embedding IS NOT NULL OR dc.embedding_half IS NOT NULL)
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- Only float16 values are stored, so the halfvec HNSW order is final (no re-ranking step)
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        1 - (dc.embedding_half <=> query_embedding::halfvec(1536)) AS similarity
+    FROM document_chunks dc
+    WHERE dc.document_id = match_document_id
+      AND dc.embedding_half IS NOT NULL
+    ORDER BY dc.embedding_half <=> query_embedding::halfvec(1536)
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
@@ -9,6 +9,8 @@ CREATE TABLE IF NOT EXISTS documents (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
     source_type VARCHAR(20) NOT NULL CHECK (source_type IN ('youtube', 'pdf')),
     source_id VARCHAR(500) NOT NULL,
+    content_hash CHAR(64),  -- sha256 of the PDF bytes / YouTube video_id, for duplicate detection
+    chunk_count INTEGER,    -- set once all chunks are stored; NULL while indexing
     title VARCHAR(500) NOT NULL,
     content TEXT NOT NULL,
     metadata JSONB DEFAULT '{}',
@@ -16,8 +18,15 @@ CREATE TABLE IF NOT EXISTS documents (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Upgrade existing databases
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS content_hash CHAR(64);
+ALTER TABLE documents ADD COLUMN IF NOT EXISTS chunk_count INTEGER;
+
 CREATE INDEX IF NOT EXISTS documents_source_idx ON documents(source_type, source_id);
 
+-- One document per identical content (rows without a hash are not constrained)
+CREATE UNIQUE INDEX IF NOT EXISTS documents_content_hash_idx ON documents(source_type, content_hash);
+
 -- Document chunks with vector embeddings for RAG
 CREATE TABLE IF NOT EXISTS document_chunks (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -25,21 +34,59 @@ CREATE TABLE IF NOT EXISTS document_chunks (
     chunk_index INTEGER NOT NULL,
     content TEXT NOT NULL,
     embedding vector(1536),  -- OpenAI text-embedding-3-small dimension
+    embedding_half halfvec(1536),  -- vector_storage=halfvec: written instead of embedding
+    embedding_bit bit(1536),       -- vector_storage=binary: sign-quantized copy of embedding
+    content_tsv tsvector GENERATED ALWAYS AS (to_tsvector('english', content)) STORED,  -- full-text search
     metadata JSONB DEFAULT '{}',
     created_at TIMESTAMPTZ DEFAULT NOW(),
     UNIQUE(document_id, chunk_index)
 );
 
--- Index for fast similarity search
-CREATE INDEX IF NOT EXISTS document_chunks_embedding_idx 
-ON document_chunks 
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- Index for fast similarity search. HNSW needs no training data (ivfflat built on an empty
+-- table keeps poor centroids), so recall holds as chunks accumulate. Existing databases:
+-- run database/migrations/001_hnsw_index.sql or backend/scripts/migrate_vector_index.py.
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_idx
+ON document_chunks
+USING hnsw (embedding vector_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Quantized storage modes (pgvector >= 0.7). HNSW skips NULLs, so unused indexes stay empty.
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS embedding_half halfvec(1536);
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS embedding_bit bit(1536);
+
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_half_idx
+ON document_chunks
+USING hnsw (embedding_half halfvec_cosine_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE INDEX IF NOT EXISTS document_chunks_embedding_bit_idx
+ON document_chunks
+USING hnsw (embedding_bit bit_hamming_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Full-text search (hybrid retrieval)
+ALTER TABLE document_chunks ADD COLUMN IF NOT EXISTS content_tsv tsvector
+    GENERATED ALWAYS AS (to_tsvector('english', content)) STORED;
+
+CREATE INDEX IF NOT EXISTS document_chunks_content_tsv_idx
+ON document_chunks
+USING gin (content_tsv);
 
 -- Index for document lookup
 CREATE INDEX IF NOT EXISTS document_chunks_document_id_idx 
 ON document_chunks(document_id);
 
+-- Generated flashcard/quiz sets, reused until the prompt version or model changes
+CREATE TABLE IF NOT EXISTS generated_sets (
+    document_id UUID NOT NULL REFERENCES documents(id) ON DELETE CASCADE,
+    kind VARCHAR(20) NOT NULL CHECK (kind IN ('flashcards', 'quiz')),
+    prompt_version INTEGER NOT NULL,
+    model VARCHAR(100) NOT NULL,
+    items JSONB NOT NULL,
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (document_id, kind, prompt_version, model)
+);
+
 -- Conversations for chat history (optional, for session continuity)
 CREATE TABLE IF NOT EXISTS conversations (
     id UUID PRIMARY KEY DEFAULT gen_random_uuid(),
@@ -106,3 +153,313 @@ BEGIN
     LIMIT match_count;
 END;
 $$ LANGUAGE plpgsql;
+
+-- Same as match_document_chunks, with the HNSW candidate list size (hnsw.ef_search) set for this call only.
+-- Higher ef_search = better recall, slower queries; it is raised to at least match_count.
+CREATE OR REPLACE FUNCTION match_document_chunks_hnsw(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+BEGIN
+    -- is_local = true: the setting ends with this call's transaction
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        1 - (dc.embedding <=> query_embedding) AS similarity
+    FROM document_chunks dc
+    WHERE dc.document_id = match_document_id
+      AND dc.embedding IS NOT NULL
+    ORDER BY dc.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Retrieval with a per-document strategy. Small documents (<= exact_scan_max_chunks chunks): exact
+-- distances over the document's rows via the document_id index. Large documents: HNSW with
+-- iterative scanning, so filtering to the document never leaves fewer than match_count rows.
+CREATE OR REPLACE FUNCTION match_document_chunks_adaptive(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        -- MATERIALIZED keeps the planner from turning this into a global ANN scan + post-filter
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND dc.embedding IS NOT NULL
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- is_local = true: settings end with this call's transaction
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;  -- pgvector < 0.8 has no iterative scans; ef_search alone bounds the candidates
+    END;
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        1 - (dc.embedding <=> query_embedding) AS similarity
+    FROM document_chunks dc
+    WHERE dc.document_id = match_document_id
+      AND dc.embedding IS NOT NULL
+    ORDER BY dc.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Quantized retrieval (vector_storage = "binary" | "halfvec" in the API settings). binary takes
+-- rerank_candidates Hamming candidates from the bit index and re-orders them by exact cosine on the
+-- float32 vectors; halfvec searches its own index directly (there is no higher-precision copy).
+-- Small documents are scanned exactly, as in match_document_chunks_adaptive.
+CREATE OR REPLACE FUNCTION match_document_chunks_binary(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000,
+    rerank_candidates INT DEFAULT 40
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+    n_candidates INT := GREATEST(rerank_candidates, match_count);
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND dc.embedding IS NOT NULL
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- Hamming-distance candidates from the bit index, re-ranked by cosine on the full vectors
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, n_candidates), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+    RETURN QUERY
+    WITH candidates AS MATERIALIZED (
+        SELECT dc.id, dc.document_id, dc.chunk_index, dc.content, dc.embedding
+        FROM document_chunks dc
+        WHERE dc.document_id = match_document_id
+          AND dc.embedding_bit IS NOT NULL
+        ORDER BY dc.embedding_bit <~> binary_quantize(query_embedding)::bit(1536)
+        LIMIT n_candidates
+    )
+    SELECT
+        c.id,
+        c.document_id,
+        c.chunk_index,
+        c.content,
+        1 - (c.embedding <=> query_embedding) AS similarity
+    FROM candidates c
+    ORDER BY c.embedding <=> query_embedding
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION match_document_chunks_halfvec(
+    query_embedding vector(1536),
+    match_document_id UUID,
+    match_count INT DEFAULT 5,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    similarity FLOAT
+) AS $$
+DECLARE
+    n_chunks INT;
+BEGIN
+    SELECT d.chunk_count INTO n_chunks FROM documents d WHERE d.id = match_document_id;
+    IF n_chunks IS NULL THEN
+        SELECT count(*) INTO n_chunks FROM document_chunks dc WHERE dc.document_id = match_document_id;
+    END IF;
+
+    IF n_chunks <= exact_scan_max_chunks THEN
+        -- COALESCE: chunks written before the switch to halfvec still have full vectors
+        RETURN QUERY
+        WITH doc AS MATERIALIZED (
+            SELECT dc.id, dc.document_id, dc.chunk_index, dc.content,
+                   COALESCE(dc.embedding, dc.embedding_half::vector(1536)) AS embedding
+            FROM document_chunks dc
+            WHERE dc.document_id = match_document_id
+              AND (dc.embedding IS NOT NULL OR dc.embedding_half IS NOT NULL)
+        )
+        SELECT
+            doc.id,
+            doc.document_id,
+            doc.chunk_index,
+            doc.content,
+            1 - (doc.embedding <=> query_embedding) AS similarity
+        FROM doc
+        ORDER BY doc.embedding <=> query_embedding
+        LIMIT match_count;
+        RETURN;
+    END IF;
+
+    -- Only float16 values are stored, so the halfvec HNSW order is final (no re-ranking step)
+    PERFORM set_config('hnsw.ef_search', LEAST(GREATEST(ef_search, match_count), 1000)::text, true);
+    BEGIN
+        PERFORM set_config('hnsw.iterative_scan', 'strict_order', true);
+    EXCEPTION WHEN OTHERS THEN
+        NULL;
+    END;
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        1 - (dc.embedding_half <=> query_embedding::halfvec(1536)) AS similarity
+    FROM document_chunks dc
+    WHERE dc.document_id = match_document_id
+      AND dc.embedding_half IS NOT NULL
+    ORDER BY dc.embedding_half <=> query_embedding::halfvec(1536)
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Full-text search over a document's chunks (websearch syntax: quoted phrases, OR, -exclusions)
+CREATE OR REPLACE FUNCTION match_document_chunks_lexical(
+    query_text TEXT,
+    match_document_id UUID,
+    match_count INT DEFAULT 5
+)
+RETURNS TABLE (
+    id UUID,
+    document_id UUID,
+    chunk_index INT,
+    content TEXT,
+    lexical_score FLOAT
+) AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        dc.id,
+        dc.document_id,
+        dc.chunk_index,
+        dc.content,
+        ts_rank_cd(dc.content_tsv, q)::FLOAT AS lexical_score
+    FROM document_chunks dc, websearch_to_tsquery('english', query_text) q
+    WHERE dc.document_id = match_document_id
+      AND dc.content_tsv @@ q
+    ORDER BY ts_rank_cd(dc.content_tsv, q) DESC
+    LIMIT match_count;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Vector (adaptive) and full-text search in one round trip. Returns the union of both top lists
+-- with each chunk's rank in either (NULL when absent); the API fuses them with reciprocal rank fusion.
+CREATE OR REPLACE FUNCTION match_document_chunks_hybrid(
+    query_embedding vector(1536),
+    query_text TEXT,
+    match_document_id UUID,
+    match_count INT DEFAULT 10,
+    ef_search INT DEFAULT 40,
+    exact_scan_max_chunks INT DEFAULT 2000
+)
+RETURNS TABLE (
+    chunk_index INT,
+    content TEXT,
+    vector_rank INT,
+    lexical_rank INT
+) AS $$
+BEGIN
+    RETURN QUERY
+    WITH vec AS (
+        SELECT m.chunk_index, m.content, (row_number() OVER (ORDER BY m.similarity DESC))::INT AS r
+        FROM match_document_chunks_adaptive(
+            query_embedding, match_document_id, match_count, ef_search, exact_scan_max_chunks
+        ) m
+    ),
+    lex AS (
+        SELECT l.chunk_index, l.content, (row_number() OVER (ORDER BY l.lexical_score DESC))::INT AS r
+        FROM match_document_chunks_lexical(query_text, match_document_id, match_count) l
+    )
+    SELECT
+        COALESCE(vec.chunk_index, lex.chunk_index),
+        COALESCE(vec.content, lex.content),
+        vec.r,
+        lex.r
+    FROM vec
+    FULL OUTER JOIN lex ON vec.chunk_index = lex.chunk_index;
+END;
+$$ LANGUAGE plpgsql;
@@ -16,6 +16,26 @@ export interface ProcessContentResponse {
   message: string;
 }
 
+export interface IngestionJobResponse {
+  job_id: string;
+  document_id: string;
+  status: string;
+  message: string;
+  /** Set when the content was already indexed; no need to poll */
+  result?: ProcessContentResponse | null;
+}
+
+export interface JobStatusResponse {
+  job_id: string;
+  kind: string;
+  document_id: string;
+  status: "queued" | "running" | "succeeded" | "failed";
+  stage: string;
+  progress: Record<string, number>;
+  error?: string | null;
+  result?: ProcessContentResponse | null;
+}
+
 export interface FlashcardItem {
   question: string;
   answer: string;
@@ -25,6 +45,8 @@ export interface FlashcardsResponse {
   flashcards: FlashcardItem[];
   document_id: string;
   count: number;
+  /** Served from the stored set instead of a new generation */
+  cached?: boolean;
 }
 
 export interface QuizItem {
@@ -38,6 +60,8 @@ export interface QuizResponse {
   quiz: QuizItem[];
   document_id: string;
   count: number;
+  /** Served from the stored set instead of a new generation */
+  cached?: boolean;
 }
 
 export interface ApiResponse<T> {
@@ -69,14 +93,61 @@ async function fetchApi<T>(
   return { success: true, data: json.data ?? json };
 }
 
-export async function processVideo(url: string) {
-  return fetchApi<ProcessContentResponse>("/process-video", {
+const JOB_POLL_INTERVAL_MS = 1000;
+/** Give up polling after this long (well past the backend's extraction and embedding limits). */
+const JOB_MAX_WAIT_MS = 15 * 60 * 1000;
+
+/** Poll a background ingestion job until it finishes, or fail once maxWaitMs has passed. */
+export async function waitForJob(
+  jobId: string,
+  onProgress?: (job: JobStatusResponse) => void,
+  maxWaitMs: number = JOB_MAX_WAIT_MS
+): Promise<ApiResponse<ProcessContentResponse>> {
+  const giveUpAt = Date.now() + maxWaitMs;
+  while (true) {
+    const res = await fetchApi<JobStatusResponse>(`/jobs/${jobId}`);
+    if (!res.success || !res.data) {
+      return { success: false, error: res.error || "Could not check processing status" };
+    }
+    const job = res.data;
+    onProgress?.(job);
+    if (job.status === "succeeded" && job.result) {
+      return { success: true, data: job.result };
+    }
+    if (job.status === "failed") {
+      return { success: false, error: job.error || "Processing failed" };
+    }
+    if (Date.now() >= giveUpAt) {
+      return {
+        success: false,
+        error: "Processing is taking longer than expected. Please check back later or try again.",
+      };
+    }
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+  }
+}
+
+export async function processVideo(
+  url: string,
+  onProgress?: (job: JobStatusResponse) => void
+) {
+  const res = await fetchApi<IngestionJobResponse>("/process-video", {
     method: "POST",
     body: JSON.stringify({ url }),
   });
+  if (!res.success || !res.data) {
+    return { success: false as const, error: res.error || "Request failed" };
+  }
+  if (res.data.status === "succeeded" && res.data.result) {
+    return { success: true, data: res.data.result };
+  }
+  return waitForJob(res.data.job_id, onProgress);
 }
 
-export async function processPdf(file: File) {
+export async function processPdf(
+  file: File,
+  onProgress?: (job: JobStatusResponse) => void
+) {
   const formData = new FormData();
   formData.append("file", file);
   const url = `${API_BASE}/process-pdf`;
@@ -98,23 +169,24 @@ export async function processPdf(file: File) {
       error: errMsg,
     };
   }
-  return {
-    success: true as const,
-    data: json.data ?? json,
-  };
+  const job: IngestionJobResponse = json.data ?? json;
+  if (job.status === "succeeded" && job.result) {
+    return { success: true, data: job.result };
+  }
+  return waitForJob(job.job_id, onProgress);
 }
 
-export async function generateFlashcards(documentId: string) {
+export async function generateFlashcards(documentId: string, regenerate = false) {
   return fetchApi<FlashcardsResponse>("/generate-flashcards", {
     method: "POST",
-    body: JSON.stringify({ document_id: documentId }),
+    body: JSON.stringify({ document_id: documentId, regenerate }),
   });
 }
 
-export async function generateQuiz(documentId: string) {
+export async function generateQuiz(documentId: string, regenerate = false) {
   return fetchApi<QuizResponse>("/generate-quiz", {
     method: "POST",
-    body: JSON.stringify({ document_id: documentId }),
+    body: JSON.stringify({ document_id: documentId, regenerate }),
   });
 }
 